@@ -35,7 +35,12 @@ DATA_PROCESSING_CONSTANTS = {
     'max_data_rows': 100000,
     'min_data_rows': 1,
     'date_format': '%Y%m',
-    'encoding_detection_bytes': 10000
+    'encoding_detection_bytes': 65536,  # 文字エンコーディング判別に使用するサンプルサイズ（先頭・末尾）
+    'encoding_detection_chunk_bytes': 4096,  # 文字エンコーディング判別でサンプルを分割して渡す単位（判別確定時点で終了）
+    'quality_score_sample_bytes': 16384,  # エンコーディング候補の品質スコア判定に使用する先頭サンプルサイズ
+    'quality_score_lines': 4,  # 品質スコア判定の対象とする先頭行数（ヘッダー行＋データ行）
+    'quality_score_head_chars': 4096,  # 先頭行の抽出時に行分割する先頭文字数（行数に満たない場合はサンプル全体を分割）
+    'session_cache_max_entries': 8  # セッション状態にキャッシュする同一データあたりの計算結果の最大件数（分類・項目名の組み合わせ）
 }
 
 # UI表示関連の定数
@@ -43,5 +48,6 @@ UI_DISPLAY_CONSTANTS = {
     'default_chart_height': 600,
     'sidebar_width': 300,
     'max_abc_display': 3,  # ABC区分の最大表示数
-    'selectbox_start_index': 1  # selectboxの開始インデックス（1始まり）
+    'selectbox_start_index': 1,  # selectboxの開始インデックス（1始まり）
+    'scatter_max_points': 20000  # 散布図1サブプロットあたりの最大描画点数
 } 
\ No newline at end of file
@@ -143,7 +143,7 @@ def show():
 
 def apply_filters(df):
     """② フィルター設定UI（分類・期間・評価方法）"""
-    from utils.common_helpers import get_enhanced_date_options, parse_date_filter_selection, get_evaluation_method_options, aggregate_data_for_cumulative_evaluation, is_single_month_selection, get_default_date_selection, get_period_filter_help_text, initialize_filter_session_state
+    from utils.common_helpers import get_enhanced_date_options, parse_date_filter_selection, get_evaluation_method_options, aggregate_data_for_cumulative_evaluation, is_single_month_selection, get_default_date_selection, get_period_filter_help_text, initialize_filter_session_state, get_unique_categories
     
     # フィルター設定のセッション状態を初期化（保持機能強化）
     initialize_filter_session_state()
@@ -157,7 +157,7 @@ def apply_filters(df):
         
         with col1:
             # 分類フィルター（初期値：全て）
-            category_options = ['全て'] + sorted(df['category_code'].dropna().unique().tolist())
+            category_options = get_unique_categories(df)
             selected_category = st.selectbox(
                 "分類",
                 category_options,
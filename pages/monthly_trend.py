@@ -4,6 +4,7 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from utils.error_calculator import calculate_error_rates, calculate_weighted_average_error_rate
+from utils.common_helpers import get_unique_categories
 from config.settings import COLOR_PALETTE, COLUMN_MAPPING
 from config.ui_styles import HELP_TEXTS
 
@@ -160,7 +161,6 @@ def show():
         """, unsafe_allow_html=True)
         
         # 事例の表形式表示
-        import pandas as pd
         example_data = {
             '': ['実績', '予測', '誤差', '絶対誤差率'],
             '2025年3月': [10, 8, 2, '20%'],
@@ -283,7 +283,7 @@ def create_filter_ui(df):
     with col1:
         # 分類フィルター
         if 'category_code' in df.columns and not df['category_code'].isna().all():
-            category_options = ['全て'] + sorted(df['category_code'].dropna().unique().tolist())
+            category_options = get_unique_categories(df)
             
             # 保存された状態を初期値として使用
             default_index = 0
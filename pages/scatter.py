@@ -4,8 +4,24 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from utils.error_calculator import calculate_error_rates, calculate_weighted_average_error_rate
-from config.constants import UNIFIED_COLOR_PALETTE, PREDICTION_TYPE_NAMES
+from utils.error_calculator import (
+    calculate_error_rates,
+    calculate_grouped_weighted_average_error_rates
+)
+from config.constants import UNIFIED_COLOR_PALETTE, PREDICTION_TYPE_NAMES, UI_DISPLAY_CONSTANTS
+
+# ABC区分別加重平均誤差率表の誤差率列定義（表示順：絶対、負、正）
+ABC_TABLE_ERROR_TYPES = {
+    'absolute_error_rate': {'label': '絶対誤差率', 'format': '{:.1%}'.format},
+    'negative_error_rate': {'label': '負の誤差率', 'format': lambda rate: f"▲{abs(rate):.1%}"},  # 負の誤差率には▲記号を付ける
+    'positive_error_rate': {'label': '正の誤差率', 'format': '＋{:.1%}'.format}  # 正の誤差率には+記号を付ける
+}
+
+# 固定色を割り当てるABC区分
+_ABC_CLASSES = frozenset(['A', 'B', 'C', 'D', 'E', 'F', 'G', 'Z'])
+
+# ABC区分カラー（統一パレットから一度だけ取得）
+_ABC_COLOR_MAP = {k: v for k, v in UNIFIED_COLOR_PALETTE.items() if k in _ABC_CLASSES}
 
 def show():
     """散布図分析ページを表示"""
@@ -91,15 +107,26 @@ def show():
         st.warning("⚠️ フィルター条件に該当するデータがありません。")
         return
     
+    # ABC区分はカテゴリ型に変換（groupby・比較・欠損補完を高速化、他ページ用の元データは変更しない）
+    if 'Class_abc' in filtered_df.columns and filtered_df['Class_abc'].dtype == 'object':
+        filtered_df = filtered_df.assign(Class_abc=filtered_df['Class_abc'].astype('category'))
+    
+    # 比較対象の予測・計画（ABC区分別表と散布図で共通）
+    prediction_columns = ['AI_pred', 'Plan_01']
+    if 'Plan_02' in df.columns:
+        prediction_columns.append('Plan_02')
+    
     # ② ABC区分別加重平均誤差率表を中項目見出しスタイルで表示
     if 'Class_abc' in filtered_df.columns:
-        prediction_columns = ['AI_pred', 'Plan_01']
-        if 'Plan_02' in df.columns:
-            prediction_columns.append('Plan_02')
-        
         abc_avg_errors = calculate_abc_average_errors(filtered_df, prediction_columns)
-        display_abc_average_table(abc_avg_errors, filtered_df)
+        display_abc_average_table(abc_avg_errors)
     
+    # 散布図セクション（フラグメント化：グラフ設定の変更時は表の再計算を行わない）
+    render_scatter_section(filtered_df, prediction_columns)
+
+@st.fragment
+def render_scatter_section(filtered_df, prediction_columns):
+    """散布図のグラフ設定UIと散布図を表示（設定変更時はこのセクションのみ再実行）"""
     # グラフタイプ選択とオプション設定
     st.markdown("---")
     
@@ -113,10 +140,6 @@ def show():
         )
     
     with col2:
-        prediction_columns = ['AI_pred', 'Plan_01']
-        if 'Plan_02' in df.columns:
-            prediction_columns.append('Plan_02')
-        
         # 初期選択は全て
         default_selections = prediction_columns
         
@@ -212,7 +235,7 @@ def show():
 
 def apply_filters(df):
     """③ フィルター設定UIとフィルター適用（分類・期間・評価方法）"""
-    from utils.common_helpers import get_enhanced_date_options, parse_date_filter_selection, get_evaluation_method_options, aggregate_data_for_cumulative_evaluation, is_single_month_selection, get_default_date_selection, get_period_filter_help_text, initialize_filter_session_state
+    from utils.common_helpers import get_enhanced_date_options, parse_date_filter_selection, get_evaluation_method_options, aggregate_data_for_cumulative_evaluation, is_single_month_selection, get_default_date_selection, get_period_filter_help_text, initialize_filter_session_state, get_unique_categories
     
     # フィルター設定のセッション状態を初期化（保持機能強化）
     initialize_filter_session_state()
@@ -226,7 +249,7 @@ def apply_filters(df):
         
         with col1:
             # 分類フィルター（初期値：全て）
-            category_options = ['全て'] + sorted(df['category_code'].dropna().unique().tolist())
+            category_options = get_unique_categories(df)
             selected_category = st.selectbox("分類", category_options, key="category_filter")
         
         with col2:
@@ -351,17 +374,40 @@ def get_prediction_name(pred_type):
     else:
         return default_name
 
+def fill_unclassified_abc(abc_series):
+    """ABC区分の欠損を「未区分」で補完（カテゴリ型の場合は先にカテゴリを追加）"""
+    if isinstance(abc_series.dtype, pd.CategoricalDtype) and '未区分' not in abc_series.cat.categories:
+        abc_series = abc_series.cat.add_categories(['未区分'])
+    return abc_series.fillna('未区分')
+
+def downsample_for_plot(df, max_points=UI_DISPLAY_CONSTANTS['scatter_max_points']):
+    """描画点数が上限を超える場合、ABC区分ごとの層化サンプリングで間引く"""
+    if len(df) <= max_points:
+        return df
+    
+    if 'Class_abc' not in df.columns:
+        return df.sample(n=max_points, random_state=0)
+    
+    # 区分ごとの構成比を維持しつつ、少数区分も最低1件は残す（凡例の欠落防止）
+    rng = np.random.default_rng(0)
+    sampling_ratio = max_points / len(df)
+    sampled_positions = [
+        rng.choice(positions, size=max(1, int(len(positions) * sampling_ratio)), replace=False)
+        for positions in df.groupby(fill_unclassified_abc(df['Class_abc']), observed=True).indices.values()
+    ]
+    return df.iloc[np.sort(np.concatenate(sampled_positions))]
+
 def get_optimal_y_max(df, selected_predictions):
     """⑤ 分類ごとに最適化されたデフォルト縦軸最大値を計算"""
-    max_values = []
-    for pred_col in selected_predictions:
-        if pred_col in df.columns:
-            max_val = df[pred_col].max()
-            if not pd.isna(max_val):
-                max_values.append(max_val)
+    target_columns = [pred_col for pred_col in selected_predictions if pred_col in df.columns]
     
-    if max_values:
-        overall_max = max(max_values)
+    # 対象列をまとめてNumPy配列化し、NaNを無視した最大値を1回の走査で取得
+    overall_max = np.nan
+    if target_columns:
+        values = df[target_columns].to_numpy(dtype='float64', na_value=np.nan)
+        overall_max = np.fmax.reduce(values, axis=None, initial=np.nan)
+    
+    if not np.isnan(overall_max):
         # 10%のマージンを追加し、適切な単位で丸める
         margin_added = overall_max * 1.1
         
@@ -381,6 +427,54 @@ def get_optimal_y_max(df, selected_predictions):
     else:
         return 1000
 
+def add_abc_scatter_traces(fig, plot_data, x_col, y_col, hover_columns, sorted_abc_classes,
+                           color_discrete_map, col_index, show_legend):
+    """ABC区分ごとにScatterglトレースを作成し、指定サブプロットへ直接追加"""
+    hovertemplate = f"{x_col}=%{{x}}<br>{y_col}=%{{y}}" + ''.join(
+        f"<br>{col}=%{{customdata[{j}]}}" for j, col in enumerate(hover_columns)
+    )
+    
+    # ABC区分がない場合は単一トレースで表示（凡例なし）
+    if 'Class_abc' not in plot_data.columns:
+        fig.add_trace(
+            go.Scattergl(
+                x=plot_data[x_col],
+                y=plot_data[y_col],
+                mode='markers',
+                name='データ',
+                showlegend=False,
+                customdata=plot_data[hover_columns].to_numpy(),
+                hovertemplate=hovertemplate
+            ),
+            row=1, col=col_index
+        )
+        return
+    
+    # 区分ごとの行位置を一括取得し、凡例がアルファベット順になるよう区分順にトレースを追加
+    class_positions = plot_data.groupby(fill_unclassified_abc(plot_data['Class_abc']), observed=True).indices
+    fallback_colors = px.colors.qualitative.Plotly
+    
+    for class_index, abc_class in enumerate(sorted_abc_classes):
+        if abc_class not in class_positions:
+            continue
+        class_data = plot_data.iloc[class_positions[abc_class]]
+        fig.add_trace(
+            go.Scattergl(
+                x=class_data[x_col],
+                y=class_data[y_col],
+                mode='markers',
+                name=abc_class if abc_class == '未区分' else f"{abc_class}区分",
+                legendgroup=str(abc_class),
+                showlegend=show_legend,
+                marker=dict(color=color_discrete_map.get(
+                    abc_class, fallback_colors[class_index % len(fallback_colors)]
+                )),
+                customdata=class_data[hover_columns].to_numpy(),
+                hovertemplate=hovertemplate
+            ),
+            row=1, col=col_index
+        )
+
 def create_error_rate_scatter(df, selected_predictions, x_min, x_max, y_max):
     """誤差率散布図を作成（⑤スケール調整対応、⑥凡例修正）"""
     
@@ -406,10 +500,10 @@ def create_error_rate_scatter(df, selected_predictions, x_min, x_max, y_max):
             subplot_titles=[get_prediction_name(pred) for pred in selected_predictions]
         )
 
-        # ⑥ 凡例用の区分を整理（アルファベット順）
+        # ⑥ 凡例用の区分を整理（アルファベット順、未設定は「未区分」として表示）
         all_abc_classes = set()
         if 'Class_abc' in df.columns:
-            all_abc_classes = set(df['Class_abc'].dropna().unique())
+            all_abc_classes = set(fill_unclassified_abc(df['Class_abc']).unique())
         
         # アルファベット順にソート
         sorted_abc_classes = sorted(list(all_abc_classes))
@@ -439,47 +533,22 @@ def create_error_rate_scatter(df, selected_predictions, x_min, x_max, y_max):
                 valid_data.loc[:, 'error_rate'] = valid_data['error_rate'].clip(lower=x_min*2, upper=x_max*2)
                 valid_data.loc[:, pred_col] = valid_data[pred_col].clip(lower=0, upper=y_max*2)
                 
-                # 色分け用の列を作成（ABC区分があれば使用）
-                if 'Class_abc' in df.columns:
-                    color_col = 'Class_abc'
-                    # ABC区分カラーを統一パレットから取得
-                    color_discrete_map = {k: v for k, v in UNIFIED_COLOR_PALETTE.items() 
-                                        if k in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'Z']}
-                    # ② 凡例をアルファベット順に表示するためのcategory_orders
-                    category_orders = {color_col: sorted_abc_classes}
-                else:
-                    color_col = None
-                    color_discrete_map = None
-                    category_orders = None
+                # 大量データ時はブラウザ描画負荷を抑えるため間引く
+                valid_data = downsample_for_plot(valid_data)
                 
-                # 散布図作成（エラーハンドリング付き）
-                scatter = px.scatter(
+                # 散布図作成（ABC区分ごとのWebGLトレースをサブプロットへ直接追加）
+                add_abc_scatter_traces(
+                    fig,
                     valid_data,
-                    x='error_rate',
-                    y=pred_col,
-                    color=color_col,
-                    color_discrete_map=color_discrete_map,
-                    category_orders=category_orders,
-                    hover_data=['P_code', 'Actual', pred_col, 'absolute_error_rate'],
-                    title=f"{get_prediction_name(pred_col)}"
+                    x_col='error_rate',
+                    y_col=pred_col,
+                    hover_columns=['P_code', 'Actual', 'absolute_error_rate'],
+                    sorted_abc_classes=sorted_abc_classes,
+                    color_discrete_map=_ABC_COLOR_MAP,
+                    col_index=i+1,
+                    show_legend=(i == 0)  # 重複削除のため、最初のサブプロットのみ凡例表示
                 )
                 
-                # ⑥ 凡例の表示順・ラベルの修正（アルファベット順、重複解消）
-                added_legends = set()
-                for trace in scatter.data:
-                    if 'Class_abc' in df.columns and trace.name and trace.name in sorted_abc_classes:
-                        legend_name = f"{trace.name}区分"
-                        trace.name = legend_name
-                        # 重複削除のため、既に追加済みの凡例は非表示
-                        if legend_name in added_legends or i > 0:
-                            trace.showlegend = False
-                        else:
-                            added_legends.add(legend_name)
-                    elif not trace.name:  # 空の名前の場合はデフォルト名を設定
-                        trace.name = "データ"
-                        trace.showlegend = False
-                    fig.add_trace(trace, row=1, col=i+1)
-                
                 # X軸に0の線を追加
                 fig.add_vline(x=0, line_dash="dash", line_color="gray", 
                              row=1, col=i+1, annotation_text="完全一致")
@@ -545,10 +614,10 @@ def create_prediction_vs_actual_scatter(df, selected_predictions, axis_max):
             subplot_titles=[get_prediction_name(pred) for pred in selected_predictions]
         )
         
-        # ⑥ 凡例用の区分を整理（アルファベット順）
+        # ⑥ 凡例用の区分を整理（アルファベット順、未設定は「未区分」として表示）
         all_abc_classes = set()
         if 'Class_abc' in df.columns:
-            all_abc_classes = set(df['Class_abc'].dropna().unique())
+            all_abc_classes = set(fill_unclassified_abc(df['Class_abc']).unique())
         
         sorted_abc_classes = sorted(list(all_abc_classes))
         
@@ -569,45 +638,22 @@ def create_prediction_vs_actual_scatter(df, selected_predictions, axis_max):
                     st.warning(f"⚠️ {get_prediction_name(pred_col)} の有効なデータがありません。")
                     continue
                 
-                # 色分け用の列を作成（ABC区分があれば使用）
-                if 'Class_abc' in df.columns:
-                    color_col = 'Class_abc'
-                    color_discrete_map = {k: v for k, v in UNIFIED_COLOR_PALETTE.items() 
-                                        if k in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'Z']}
-                    # ② 凡例をアルファベット順に表示するためのcategory_orders
-                    category_orders = {color_col: sorted_abc_classes}
-                else:
-                    color_col = None
-                    color_discrete_map = None
-                    category_orders = None
+                # 大量データ時はブラウザ描画負荷を抑えるため間引く
+                plot_data = downsample_for_plot(plot_data)
                 
-                # 散布図作成（エラーハンドリング付き）
-                scatter = px.scatter(
+                # 散布図作成（ABC区分ごとのWebGLトレースをサブプロットへ直接追加）
+                add_abc_scatter_traces(
+                    fig,
                     plot_data,
-                    x='Actual',
-                    y=pred_col,
-                    color=color_col,
-                    color_discrete_map=color_discrete_map,
-                    category_orders=category_orders,
-                    hover_data=['P_code', 'Date'],
-                    title=f"{get_prediction_name(pred_col)} vs 実績"
+                    x_col='Actual',
+                    y_col=pred_col,
+                    hover_columns=['P_code', 'Date'],
+                    sorted_abc_classes=sorted_abc_classes,
+                    color_discrete_map=_ABC_COLOR_MAP,
+                    col_index=i+1,
+                    show_legend=(i == 0)  # 重複削除のため、最初のサブプロットのみ凡例表示
                 )
                 
-                # ⑥ 凡例の表示順・ラベルの修正
-                added_legends = set()
-                for trace in scatter.data:
-                    if 'Class_abc' in df.columns and trace.name and trace.name in sorted_abc_classes:
-                        legend_name = f"{trace.name}区分"
-                        trace.name = legend_name
-                        if legend_name in added_legends or i > 0:
-                            trace.showlegend = False
-                        else:
-                            added_legends.add(legend_name)
-                    elif not trace.name:  # 空の名前の場合はデフォルト名を設定
-                        trace.name = "データ"
-                        trace.showlegend = False
-                    fig.add_trace(trace, row=1, col=i+1)
-                
                 # 完全一致ライン（y=x）を追加（軸最大値に合わせて調整）
                 fig.add_trace(
                     go.Scatter(
@@ -664,49 +710,36 @@ def calculate_abc_average_errors(df, selected_predictions):
     for pred_col in selected_predictions:
         df_with_errors = calculate_error_rates(df, pred_col, 'Actual')
         
-        # ABC区分別の加重平均誤差率計算（全区分対応・未区分対応）
-        abc_stats = {}
         # 未区分（NaN）も含めて処理
-        df_with_errors['Class_abc'] = df_with_errors['Class_abc'].fillna('未区分')
-        unique_abc_classes = sorted(df_with_errors['Class_abc'].unique())
-        
-        for abc_class in unique_abc_classes:
-            abc_data = df_with_errors[df_with_errors['Class_abc'] == abc_class]
-            if not abc_data.empty and len(abc_data) > 0:
-                # 絶対誤差率の加重平均（全データ対象）
-                absolute_weighted_avg = calculate_weighted_average_error_rate(
-                    abc_data, 'absolute_error_rate', 'Actual'
-                )
-                
-                # 正の誤差率の加重平均（positive_error_rate列を使用、誤差率0%を含む）
-                positive_weighted_avg = calculate_weighted_average_error_rate(
-                    abc_data, 'positive_error_rate', 'Actual'
-                )
-                
-                # 負の誤差率の加重平均（negative_error_rate列を使用、誤差率0%を除外）
-                negative_weighted_avg = calculate_weighted_average_error_rate(
-                    abc_data, 'negative_error_rate', 'Actual'
-                )
-                
-                # NaNの場合は0.0に設定
-                if pd.isna(positive_weighted_avg):
-                    positive_weighted_avg = 0.0
-                if pd.isna(negative_weighted_avg):
-                    negative_weighted_avg = 0.0
-                
-                abc_stats[abc_class] = {
-                    'count': len(abc_data),
-                    'actual_sum': abc_data['Actual'].sum(),
-                    'absolute_error_rate': absolute_weighted_avg,
-                    'positive_error_rate': positive_weighted_avg,
-                    'negative_error_rate': negative_weighted_avg
-                }
+        df_with_errors['Class_abc'] = fill_unclassified_abc(df_with_errors['Class_abc'])
+        
+        # ABC区分別の加重平均誤差率計算（全区分対応・未区分対応）を予測カラムごとに1回で一括集計
+        class_results = calculate_grouped_weighted_average_error_rates(df_with_errors, 'Class_abc', 'Actual')
+        
+        # 正・負の誤差率はNaNの場合は0.0に設定
+        class_results[['positive_error_rate', 'negative_error_rate']] = (
+            class_results[['positive_error_rate', 'negative_error_rate']].fillna(0.0)
+        )
+        
+        abc_stats = {
+            abc_class: {
+                'count': int(row['count']),
+                'actual_sum': row['actual_sum'],
+                'absolute_error_rate': row['absolute_error_rate'],
+                'positive_error_rate': row['positive_error_rate'],
+                'negative_error_rate': row['negative_error_rate'],
+                # 合計行の全体加重平均用に、誤差率別の分子Σ(誤差率×実績値)と分母Σ(実績値)を保持
+                'weighted_error_sums': {col: row[f'_w_{col}'] for col in ABC_TABLE_ERROR_TYPES},
+                'weight_sums': {col: row[f'_d_{col}'] for col in ABC_TABLE_ERROR_TYPES}
+            }
+            for abc_class, row in class_results.iterrows()
+        }
         
         abc_errors[pred_col] = abc_stats
     
     return abc_errors
 
-def display_abc_average_table(abc_errors, filtered_df):
+def display_abc_average_table(abc_errors):
     """② ABC区分別加重平均誤差率のテーブルを中項目見出しスタイルで表示"""
     if not abc_errors:
         st.info("ABC区分データがありません")
@@ -728,176 +761,108 @@ def display_abc_average_table(abc_errors, filtered_df):
         st.info("ABC区分データがありません")
         return
     
-    # ABC区分をソート（A, B, C, D...の順）
-    sorted_abc_classes = sorted(list(all_abc_classes))
-    
-    # 2段ヘッダー構造のMultiIndex作成（1行目非表示対応）
-    columns_tuples = [
-        ('', '区分'),
-        ('', '件数'),
-        ('', '実績合計')
-    ]
-    
-    for error_type in ['絶対誤差率', '負の誤差率', '正の誤差率']:
-        for pred_col in sorted(abc_errors.keys()):
-            pred_name = get_prediction_name(pred_col)
-            columns_tuples.append((error_type, pred_name))
-    
-    multi_columns = pd.MultiIndex.from_tuples(columns_tuples)
-    
-    # データ作成
-    table_data = []
-    total_counts = {}
-    total_actual_sums = {}
-    
-    # 予測カラム別の合計を計算
-    for pred_col in abc_errors.keys():
-        total_counts[pred_col] = sum(stats['count'] for stats in abc_errors[pred_col].values())
-        total_actual_sums[pred_col] = sum(stats['actual_sum'] for stats in abc_errors[pred_col].values())
+    # ABC区分・予測カラムをソート（A, B, C, D...の順）し、以降の処理で使い回す
+    sorted_abc_classes = sorted(all_abc_classes)
+    pred_order = sorted(abc_errors.keys())
+    rate_columns = [(error_type, pred_col) for error_type in ABC_TABLE_ERROR_TYPES for pred_col in pred_order]
     
-    # ABC区分別のデータ作成
+    # ABC区分別のデータ作成（数値のまま1行1辞書で作成）
+    records = []
     for abc_class in sorted_abc_classes:
-        row_data = [f'{abc_class}区分']
-        
-        # 件数と実績合計の計算（全予測の平均または合計）
-        total_count = 0
-        total_actual = 0
-        
-        for pred_col in sorted(abc_errors.keys()):
-            if abc_class in abc_errors[pred_col]:
-                stats = abc_errors[pred_col][abc_class]
-                total_count = max(total_count, stats['count'])  # 最大値を使用（同じ区分なので）
-                total_actual = max(total_actual, stats['actual_sum'])  # 最大値を使用
-        
-        # 件数と実績合計を文字列形式でフォーマット
-        row_data.extend([f"{total_count:,}", f"{total_actual:,.0f}"])
-        
-        # 各誤差率の値を追加（絶対、負、正の順）
-        for error_type in ['absolute_error_rate', 'negative_error_rate', 'positive_error_rate']:
-            for pred_col in sorted(abc_errors.keys()):
-                if abc_class in abc_errors[pred_col]:
-                    error_rate = abc_errors[pred_col][abc_class][error_type]
-                    if error_type == 'positive_error_rate':
-                        # 正の誤差率には+記号を付ける
-                        formatted_rate = f"＋{error_rate:.1%}"
-                    elif error_type == 'negative_error_rate':
-                        # 負の誤差率には▲記号を付ける
-                        formatted_rate = f"▲{abs(error_rate):.1%}"
-                    else:
-                        formatted_rate = f"{error_rate:.1%}"
-                    row_data.append(formatted_rate)
-                else:
-                    # データがない場合
-                    if error_type == 'positive_error_rate':
-                        row_data.append("＋0.0%")
-                    elif error_type == 'negative_error_rate':
-                        row_data.append("▲0.0%")
-                    else:
-                        row_data.append("0.0%")
-        
-        table_data.append(row_data)
-    
-    # 合計行の作成
-    total_row_data = ['合計']
-    
-    # より正確な合計計算（最初の予測カラムから全データの合計を計算）
-    if abc_errors:
-        first_pred = list(abc_errors.keys())[0]
-        grand_total_count = sum(stats['count'] for stats in abc_errors[first_pred].values())
-        grand_total_actual = sum(stats['actual_sum'] for stats in abc_errors[first_pred].values())
-    else:
-        grand_total_count = 0
-        grand_total_actual = 0
-    
-    # 合計行も文字列形式でフォーマット
-    total_row_data.extend([f"{grand_total_count:,}", f"{grand_total_actual:,.0f}"])
-    
-    # 各誤差率の全体加重平均を計算（集計方針準拠）
-    for error_type in ['absolute_error_rate', 'negative_error_rate', 'positive_error_rate']:
-        for pred_col in sorted(abc_errors.keys()):
-            # 全体の加重平均を計算（専用の誤差率列を使用）
-            df_with_errors = calculate_error_rates(filtered_df, pred_col, 'Actual')
-            
-            if error_type == 'positive_error_rate':
-                # positive_error_rate列を使用（誤差率0%を含む）
-                overall_rate = calculate_weighted_average_error_rate(df_with_errors, 'positive_error_rate', 'Actual')
-                if pd.isna(overall_rate):
-                    overall_rate = 0.0
-                formatted_rate = f"＋{overall_rate:.1%}"
-                    
-            elif error_type == 'negative_error_rate':
-                # negative_error_rate列を使用（誤差率0%を除外）
-                overall_rate = calculate_weighted_average_error_rate(df_with_errors, 'negative_error_rate', 'Actual')
-                if pd.isna(overall_rate):
-                    overall_rate = 0.0
-                formatted_rate = f"▲{abs(overall_rate):.1%}"
-                    
-            else:  # absolute_error_rate
-                # absolute_error_rate列を使用（全データ対象）
-                overall_rate = calculate_weighted_average_error_rate(df_with_errors, 'absolute_error_rate', 'Actual')
-                if pd.isna(overall_rate):
-                    overall_rate = 0.0
-                formatted_rate = f"{overall_rate:.1%}"
-            
-            total_row_data.append(formatted_rate)
+        class_stats = [abc_errors[pred_col][abc_class] for pred_col in pred_order if abc_class in abc_errors[pred_col]]
+        record = {
+            '区分': f'{abc_class}区分',
+            # 件数と実績合計は同じ区分なので全予測の最大値を使用
+            '件数': max(stats['count'] for stats in class_stats),
+            '実績合計': max(stats['actual_sum'] for stats in class_stats)
+        }
+        for error_type, pred_col in rate_columns:
+            # データがない場合は0.0%として表示
+            record[(error_type, pred_col)] = abc_errors[pred_col].get(abc_class, {}).get(error_type, 0.0)
+        records.append(record)
+    
+    # 合計行の作成（最初の予測カラムから全データの合計を計算）
+    first_pred = list(abc_errors.keys())[0]
+    total_record = {
+        '区分': '合計',
+        '件数': sum(stats['count'] for stats in abc_errors[first_pred].values()),
+        '実績合計': sum(stats['actual_sum'] for stats in abc_errors[first_pred].values())
+    }
     
-    table_data.append(total_row_data)
+    # 各誤差率の全体加重平均を区分別の分子・分母の合計から計算（集計方針準拠、誤差率の再計算は不要）
+    for error_type, pred_col in rate_columns:
+        class_stats = abc_errors[pred_col].values()
+        weight_sum = sum(stats['weight_sums'][error_type] for stats in class_stats)
+        weighted_error_sum = sum(stats['weighted_error_sums'][error_type] for stats in class_stats)
+        total_record[(error_type, pred_col)] = weighted_error_sum / weight_sum if weight_sum != 0 else 0.0
+    records.append(total_record)
+    
+    # DataFrameを一括作成し、列単位で表示用文字列にフォーマット
+    raw_table = pd.DataFrame.from_records(records, columns=['区分', '件数', '実績合計'] + rate_columns)
+    formatted_columns = [
+        raw_table['区分'],
+        raw_table['件数'].map('{:,}'.format),
+        raw_table['実績合計'].map('{:,.0f}'.format)
+    ] + [
+        raw_table[(error_type, pred_col)].map(ABC_TABLE_ERROR_TYPES[error_type]['format'])
+        for error_type, pred_col in rate_columns
+    ]
     
-    # DataFrame作成
-    df_table = pd.DataFrame(table_data, columns=multi_columns)
+    # 2段ヘッダー構造のMultiIndex作成（1行目非表示対応）
+    multi_columns = pd.MultiIndex.from_tuples(
+        [('', '区分'), ('', '件数'), ('', '実績合計')] + [
+            (ABC_TABLE_ERROR_TYPES[error_type]['label'], get_prediction_name(pred_col))
+            for error_type, pred_col in rate_columns
+        ]
+    )
+    df_table = pd.concat(formatted_columns, axis=1, ignore_index=True)
+    df_table.columns = multi_columns
     
     # カスタムCSS for 調整済みカラム幅（1行目ヘッダー非表示）
+    # 静的な集計表のため、HTMLテーブルとして事前レンダリングして表示（データグリッドの生成を省略）
     table_css = """
     <style>
-    .stDataFrame > div {
+    table.abc-summary {
         width: 100%;
+        border-collapse: collapse;
+        font-size: 14px;
+        margin-bottom: 0.5rem;
     }
-    .stDataFrame table {
-        width: 100% !important;
-    }
-    .stDataFrame th, .stDataFrame td {
+    table.abc-summary th, table.abc-summary td {
+        border: 1px solid #ddd;
+        padding: 6px 8px;
         text-align: center !important;
     }
-    /* 区分列：8% */
-    .stDataFrame th:nth-child(1), .stDataFrame td:nth-child(1) {
-        width: 8% !important;
-        min-width: 60px !important;
-    }
-    /* 件数列：8% */
-    .stDataFrame th:nth-child(2), .stDataFrame td:nth-child(2) {
-        width: 8% !important;
-        min-width: 60px !important;
+    table.abc-summary th {
+        background-color: #f8f9fa;
+        font-weight: bold;
+        color: #333;
     }
-    /* 実績合計列：8% */
-    .stDataFrame th:nth-child(3), .stDataFrame td:nth-child(3) {
-        width: 8% !important;
-        min-width: 60px !important;
+    /* 区分列・件数列・実績合計列：各8% */
+    table.abc-summary th:nth-child(-n+3), table.abc-summary td:nth-child(-n+3) {
+        width: 8%;
+        min-width: 60px;
     }
-    /* 残り6列（計画値01、計画値02、AI予測値のそれぞれ3種類）：各12.67% */
-    .stDataFrame th:nth-child(n+4), .stDataFrame td:nth-child(n+4) {
-        width: 12.67% !important;
-        min-width: 80px !important;
+    /* 残りの誤差率列（計画値01、計画値02、AI予測値のそれぞれ3種類） */
+    table.abc-summary th:nth-child(n+4), table.abc-summary td:nth-child(n+4) {
+        min-width: 80px;
     }
     /* 1行目のヘッダー（MultiIndexの最上位レベル）を非表示 */
-    .stDataFrame thead tr:first-child {
+    table.abc-summary thead tr:first-child {
         display: none;
     }
-    /* 左側3列の1行目ヘッダーの境界線も非表示 */
-    .stDataFrame thead tr:first-child th:nth-child(1),
-    .stDataFrame thead tr:first-child th:nth-child(2),
-    .stDataFrame thead tr:first-child th:nth-child(3) {
-        border-bottom: none !important;
+    /* 合計行を太字で表示 */
+    table.abc-summary tbody tr:last-child td {
+        background-color: #f1f8e9;
+        font-weight: bold;
     }
     </style>
     """
     st.markdown(table_css, unsafe_allow_html=True)
     
     # テーブル表示
-    st.dataframe(
-        df_table,
-        use_container_width=True,
-        hide_index=True
-    )
+    table_html = df_table.to_html(index=False, classes='abc-summary', border=0)
+    st.markdown(table_html, unsafe_allow_html=True)
     
     # 注釈の配置とスタイル調整（表の下部に移動、UI/UXガイドライン準拠）
     st.markdown("""
@@ -1,8 +1,20 @@
+import codecs
+import csv
+import datetime
+import io
+import re
+import weakref
+from types import MappingProxyType
 import streamlit as st
 import pandas as pd
 import numpy as np
-import chardet
+# 文字エンコーディング判別（C拡張のcchardetを優先、未インストール時はchardetを使用）
+try:
+    import cchardet as chardet
+except ImportError:
+    import chardet
 from utils.validators import validate_data, validate_required_columns
+from utils.common_helpers import get_unique_categories
 from utils.data_processor import (
     preview_data, 
     calculate_abc_classification, 
@@ -10,7 +22,11 @@ from utils.data_processor import (
     get_abc_classification_summary,
     calculate_abc_classification_by_quantity,
     validate_abc_quantity_categories,
-    calculate_default_quantity_ranges
+    calculate_default_quantity_ranges,
+    normalize_numeric_columns,
+    downcast_integer_columns,
+    get_present_categories,
+    PYARROW_AVAILABLE
 )
 from config.settings import ABC_CLASSIFICATION_SETTINGS, COLUMN_MAPPING
 from config.ui_styles import HELP_TEXTS, ABC_EXPLANATION
@@ -18,11 +34,59 @@ from config.constants import DATA_PROCESSING_CONSTANTS, UI_DISPLAY_CONSTANTS
 from config.help_texts import MAPPING_TEXTS, ABC_TEXTS, FILE_UPLOAD_TEXTS
 from config.css_styles import get_page_css
 
+# ABC区分のデフォルト設定（読み取り専用のテンプレート、セッション状態には区分ごとの辞書をコピーして使用）
+ABC_DEFAULT_CATEGORIES = tuple(
+    MappingProxyType(dict(category)) for category in ABC_CLASSIFICATION_SETTINGS['default_categories']
+)
+
+# 日本語品質スコア判定用の正規表現（読み込み時に一度だけコンパイル）
+HIRAGANA_PATTERN = re.compile(r'[\u3040-\u309F]')
+KATAKANA_PATTERN = re.compile(r'[\u30A0-\u30FF]')
+KANJI_PATTERN = re.compile(r'[\u4E00-\u9FAF]')
+JAPANESE_CHAR_PATTERN = re.compile(r'[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FAF]')
+
+# 文字化けパターンと減点（いずれかを含むかを1回の走査で判定する結合パターン付き）
+GARBLED_PATTERNS = [
+    ('��', -5),  # よくある文字化け記号
+    ('����', -5),
+    ('ï¿½', -5),
+    ('\ufffd', -5),  # Unicode replacement character
+    ('Ã¤', -3),    # UTF-8の文字化け
+    ('Ã¯', -3),
+    ('Ã¦', -3),
+    ('â€', -3),
+    ('ã¤', -3),    # 追加の文字化けパターン
+    ('ã¯', -3),
+    ('ã¦', -3),
+    ('ã¨', -3),
+    ('ã‚', -3),
+    ('ã„', -3),
+    ('ã†', -3),
+    ('ã…', -3),
+    ('ê', -2),     # MacRoman由来の文字化け
+    ('ë', -2),
+    ('è', -2),
+    ('é', -2),
+]
+GARBLED_PATTERN_REGEX = re.compile('|'.join(re.escape(pattern) for pattern, _ in GARBLED_PATTERNS))
+
+# 品質スコアで加点する意味のある文字列（このファイル特有の内容も含む）
+MEANINGFUL_PATTERNS = (
+    'コード', 'データ', '実績', '予測', '計画', '分類', '年月',
+    '商品', '売上', '需要', '在庫', '価格', '金額', '数量',
+    '生産工場', '生産ライン', 'ABC区分', '出庫実績', 'ハイブリッド',
+    '構成比率', '異常値', '須賀川'  # このファイル特有の内容
+)
+
+# ページのCSS（読み込み時に一度だけ結合）
+PAGE_CSS = get_page_css('upload')
+
 def show():
     """データセット作成ページを表示"""
     
     # カスタムCSS（統合スタイル使用）
-    st.markdown(get_page_css('upload'), unsafe_allow_html=True)
+    # 再実行のたびに出力しないと要素が削除されてスタイルが外れるため、出力自体は毎回行う
+    st.markdown(PAGE_CSS, unsafe_allow_html=True)
     
     # セッション状態の初期化
     if 'original_data' not in st.session_state:
@@ -31,6 +95,8 @@ def show():
         st.session_state.uploaded_filename = None
     if 'data_columns' not in st.session_state:
         st.session_state.data_columns = []
+    if '_column_index' not in st.session_state:
+        set_column_options(st.session_state.data_columns)
     if 'current_mapping' not in st.session_state:
         st.session_state.current_mapping = {}
     if 'mapping_completed' not in st.session_state:
@@ -40,7 +106,7 @@ def show():
     if 'monthly_correction_completed' not in st.session_state:
         st.session_state.monthly_correction_completed = False
     if 'abc_categories' not in st.session_state:
-        st.session_state.abc_categories = ABC_CLASSIFICATION_SETTINGS['default_categories'].copy()
+        st.session_state.abc_categories = [dict(category) for category in ABC_DEFAULT_CATEGORIES]
     if 'abc_auto_generate' not in st.session_state:
         st.session_state.abc_auto_generate = True
     if 'abc_setting_mode' not in st.session_state:
@@ -190,10 +256,12 @@ def show_step1():
                 # データ読み込み（エンコーディング自動判別）
                 df, _ = read_csv_with_encoding(uploaded_file)
                 
-                # セッション状態に保存
-                st.session_state.original_data = df
+                # セッション状態に保存（プレビューは保存前のデータから作成）
+                st.session_state['_original_data_preview'] = create_preview(df, DATA_PROCESSING_CONSTANTS['default_preview_rows'])
+                store_original_data(df)
                 st.session_state.uploaded_filename = uploaded_file.name
                 st.session_state.data_columns = list(df.columns)
+                set_column_options(st.session_state.data_columns)
                 st.session_state.current_mapping = {}
                 st.session_state.mapping_completed = False
                 st.session_state.monthly_correction_completed = False
@@ -212,10 +280,7 @@ def show_step1():
         st.markdown('<div class="result-section">', unsafe_allow_html=True)
         st.markdown(f'<div class="section-subtitle">データプレビュー（上位{DATA_PROCESSING_CONSTANTS["default_preview_rows"]}件）</div>', unsafe_allow_html=True)
         
-        df = st.session_state.original_data
-        preview_df = df.head(DATA_PROCESSING_CONSTANTS['default_preview_rows']).copy()
-        preview_df.index = range(UI_DISPLAY_CONSTANTS['selectbox_start_index'], len(preview_df) + UI_DISPLAY_CONSTANTS['selectbox_start_index'])
-        st.dataframe(preview_df, use_container_width=True)
+        st.dataframe(st.session_state['_original_data_preview'], use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
 def show_step2():
@@ -223,40 +288,41 @@ def show_step2():
     st.markdown('<div class="step-title">データマッピング</div>', unsafe_allow_html=True)
     st.markdown('<div class="step-annotation">読み込んだCSVデータの列名を、システム項目にマッピングしてください（＝対応する項目に紐づけます）。この設定は通常1回のみで完了します。</div>', unsafe_allow_html=True)
     
-    # マッピング設定UI
+    # マッピング設定UI（選択肢はデータ読み込み時に作成したものを共通で使用）
     mapping = {}
+    column_options = st.session_state['_column_options']
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("**必須項目**")
         mapping['P_code'] = st.selectbox(
             "商品コード（P_code）",
-            options=[''] + st.session_state.data_columns,
-            index=get_selectbox_index(st.session_state.data_columns, st.session_state.current_mapping.get('P_code', '')),
+            options=column_options,
+            index=get_selectbox_index(st.session_state.current_mapping.get('P_code', '')),
             help=HELP_TEXTS['product_code_help']
         )
         mapping['Date'] = st.selectbox(
             "年月（Date）",
-            options=[''] + st.session_state.data_columns,
-            index=get_selectbox_index(st.session_state.data_columns, st.session_state.current_mapping.get('Date', '')),
+            options=column_options,
+            index=get_selectbox_index(st.session_state.current_mapping.get('Date', '')),
             help=HELP_TEXTS['date_help']
         )
         mapping['Actual'] = st.selectbox(
             "実績値（Actual）",
-            options=[''] + st.session_state.data_columns,
-            index=get_selectbox_index(st.session_state.data_columns, st.session_state.current_mapping.get('Actual', '')),
+            options=column_options,
+            index=get_selectbox_index(st.session_state.current_mapping.get('Actual', '')),
             help=HELP_TEXTS['actual_help']
         )
         mapping['AI_pred'] = st.selectbox(
             "AI予測値（AI_pred）", 
-            options=[''] + st.session_state.data_columns,
-            index=get_selectbox_index(st.session_state.data_columns, st.session_state.current_mapping.get('AI_pred', '')),
+            options=column_options,
+            index=get_selectbox_index(st.session_state.current_mapping.get('AI_pred', '')),
             help=HELP_TEXTS['ai_pred_help']
         )
         mapping['Plan_01'] = st.selectbox(
             "計画値01（Plan_01）",
-            options=[''] + st.session_state.data_columns,
-            index=get_selectbox_index(st.session_state.data_columns, st.session_state.current_mapping.get('Plan_01', '')),
+            options=column_options,
+            index=get_selectbox_index(st.session_state.current_mapping.get('Plan_01', '')),
             help=HELP_TEXTS['plan_01_help']
         )
         
@@ -264,14 +330,14 @@ def show_step2():
         st.markdown("**任意項目**")
         mapping['category_code'] = st.selectbox(
             "分類（category_code）",
-            options=[''] + st.session_state.data_columns,
-            index=get_selectbox_index(st.session_state.data_columns, st.session_state.current_mapping.get('category_code', '')),
+            options=column_options,
+            index=get_selectbox_index(st.session_state.current_mapping.get('category_code', '')),
             help=HELP_TEXTS['class_01_help']
         )
         mapping['Plan_02'] = st.selectbox(
             "計画値02（Plan_02）",
-            options=[''] + st.session_state.data_columns,
-            index=get_selectbox_index(st.session_state.data_columns, st.session_state.current_mapping.get('Plan_02', '')),
+            options=column_options,
+            index=get_selectbox_index(st.session_state.current_mapping.get('Plan_02', '')),
             help=HELP_TEXTS['plan_02_help']
         )
         
@@ -282,8 +348,8 @@ def show_step2():
         # ABC区分の選択（任意項目に移動）
         mapping['Class_abc'] = st.selectbox(
             "ABC区分（Class_abc）",
-            options=[''] + st.session_state.data_columns,
-            index=get_selectbox_index(st.session_state.data_columns, st.session_state.current_mapping.get('Class_abc', '')),
+            options=column_options,
+            index=get_selectbox_index(st.session_state.current_mapping.get('Class_abc', '')),
             help=HELP_TEXTS['abc_class_help']
         )
     
@@ -335,7 +401,7 @@ def show_step2():
                 with st.status("🔄 データマッピング実行中...", expanded=True) as status:
                     st.write("カラム名を変換中...")
                     
-                    mapped_df = apply_mapping(st.session_state.original_data, mapping)
+                    mapped_df = apply_mapping(get_original_data(), mapping)
                     
                     # データ検証
                     st.write("🔍 データを検証中...")
@@ -362,21 +428,17 @@ def show_step2():
         
         # 変換後データプレビュー
         st.markdown('<div class="section-subtitle">変換後データプレビュー（上位5件）</div>', unsafe_allow_html=True)
-        preview_df = st.session_state.data.head(5).copy()
-        preview_df.index = range(1, len(preview_df) + 1)
+        preview_df = get_cached_preview(st.session_state.data, 5, '_mapped_data_preview')
         
-        # 年月の表示形式を統一（YYYYMM → YYYY年MM月）
+        # 年月の表示形式を統一（YYYYMM → YYYY年MM月、キャッシュしたプレビューは変更せずassignで新しい表を作成）
         if 'Date' in preview_df.columns:
-            preview_df['Date'] = preview_df['Date'].apply(lambda x: 
-                f"{str(x)[:4]}年{str(x)[4:6]}月" if len(str(x)) == 6 else str(x)
+            date_str = preview_df['Date'].astype(str)
+            preview_df = preview_df.assign(
+                Date=(date_str.str[:4] + '年' + date_str.str[4:6] + '月').where(date_str.str.len() == 6, date_str)
             )
         
-        # カスタム項目名を反映
-        display_names = get_display_column_names()
-        preview_df_display = preview_df.copy()
-        for col in preview_df_display.columns:
-            if col in display_names:
-                preview_df_display = preview_df_display.rename(columns={col: display_names[col]})
+        # カスタム項目名を反映（対象列をまとめて1回で変更）
+        preview_df_display = preview_df.rename(columns=get_display_column_names())
         
         st.dataframe(preview_df_display, use_container_width=True)
         
@@ -412,6 +474,8 @@ def show_step3():
     
     # 結果表示
     if st.session_state.monthly_correction_completed:
+        # 補正後のデータはこの後何度も参照するためローカル変数に取得
+        data = st.session_state.data
         st.markdown('<div class="result-section">', unsafe_allow_html=True)
         st.success("✅ 年月別データの集計結果です。月別合計値補正を実施した場合は、AI予測値と計画値の月別合計が一致しているかをご確認ください。")
         
@@ -423,15 +487,12 @@ def show_step3():
             has_category_data = False
             category_options = ['全て']
             
-            if 'category_code' in st.session_state.data.columns:
-                # 分類データの取得（null値を除外し、文字列として処理）
-                category_values = st.session_state.data['category_code'].dropna()
-                if not category_values.empty:
-                    # 文字列変換して重複を除去
-                    unique_categories = sorted(list(set(category_values.astype(str))))
-                    if unique_categories:
-                        category_options.extend(unique_categories)
-                        has_category_data = True
+            if 'category_code' in data.columns:
+                # 分類の一意値を取得（null値を除外、分類はマッピング時に文字列に統一済み）
+                unique_categories = get_category_options(data, include_all=False)
+                if unique_categories:
+                    category_options.extend(unique_categories)
+                    has_category_data = True
             
             # 分類フィルターの表示
             if has_category_data:
@@ -451,19 +512,17 @@ def show_step3():
         # 月別集計表の表示（フィルター適用）
         try:
             # 分類フィルターが適用された場合の処理
-            if selected_category != '全て' and 'category_code' in st.session_state.data.columns:
+            if selected_category != '全て' and 'category_code' in data.columns:
                 # 選択された分類でフィルタリング
-                filtered_data = st.session_state.data[
-                    st.session_state.data['category_code'].astype(str) == selected_category
-                ]
+                filtered_data = get_category_data(data, selected_category)
                 if not filtered_data.empty:
-                    monthly_summary = create_monthly_summary_table(filtered_data)
+                    monthly_summary = get_monthly_summary_table(data, selected_category)
                 else:
                     st.warning(f"⚠️ 選択された分類「{selected_category}」にデータが見つかりません。")
-                    monthly_summary = create_monthly_summary_table(st.session_state.data)
+                    monthly_summary = get_monthly_summary_table(data)
             else:
                 # 全データまたは分類フィルターなしの場合
-                monthly_summary = create_monthly_summary_table(st.session_state.data)
+                monthly_summary = get_monthly_summary_table(data)
             
             # テーブル表示（Streamlit標準のcolumn_configで数値項目を左詰めカンマ付き）
             if not monthly_summary.empty:
@@ -490,13 +549,12 @@ def show_step3():
                             width="medium"
                         )
                 
-                # 数値項目にカンマを追加
+                # 数値項目にカンマを追加（年月以外の数値列を列単位で変換）
                 formatted_summary = monthly_summary.copy()
                 for col in formatted_summary.columns:
-                    if col != "年月":  # 年月以外の数値項目
-                        formatted_summary[col] = formatted_summary[col].apply(
-                            lambda x: f"{x:,}" if isinstance(x, (int, float)) and str(x) != "合計" else x
-                        )
+                    if col != "年月" and pd.api.types.is_numeric_dtype(formatted_summary[col]):
+                        formatted_summary[col] = formatted_summary[col].map('{:,}'.format)
+                formatted_summary = to_arrow_string_table(formatted_summary)
                 
                 st.dataframe(
                     formatted_summary, 
@@ -581,7 +639,7 @@ def show_step4():
         # 対象分類の選択
         if 'category_code' in st.session_state.data.columns:
             st.markdown('<div class="section-subtitle">対象分類選択</div>', unsafe_allow_html=True)
-            available_categories = sorted(st.session_state.data['category_code'].dropna().unique().tolist())
+            available_categories = get_category_options(st.session_state.data, include_all=False)
             # 「全て」選択肢を先頭に追加
             category_options = ['全て'] + available_categories
             
@@ -611,7 +669,7 @@ def show_step4():
                     st.session_state.abc_quantity_auto_calculated = False
                 st.session_state.selected_generation_categories = selected_categories
         
-        # ABC区分設定の詳細設定
+        # ABC区分設定の詳細設定（フラグメント化：区分の編集時はページ全体を再実行しない）
         show_abc_settings()
         
         # 実行ボタン
@@ -634,25 +692,109 @@ def show_step4():
         st.markdown('<div class="step-annotation">分類単位で複数回実行可能です。必要に応じて、分類フィルターから対象を選択して再実行してください。</div>', unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
-def get_selectbox_index(options, value):
-    """selectboxのindex値を取得"""
+def store_original_data(df):
+    """読み込んだデータをセッション状態に保存（圧縮したParquet形式で保持してメモリ使用量を削減、変換できない場合はそのまま保持）"""
     try:
-        if value in options:
-            return options.index(value) + 1  # 空の選択肢があるため+1
-        else:
-            return 0
-    except:
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, compression='zstd')
+        st.session_state.original_data = buffer.getvalue()
+    except Exception:
+        # pyarrow未インストール、型の混在した列などParquet形式に変換できない場合
+        st.session_state.original_data = df
+
+def get_original_data():
+    """セッション状態に保存した読み込みデータを取得（Parquet形式の場合は復元）"""
+    original_data = st.session_state.original_data
+    if not isinstance(original_data, bytes):
+        return original_data
+    
+    df = pd.read_parquet(io.BytesIO(original_data))
+    
+    # 文字列列の欠損値を読み込み時と同じNaNに統一（欠損値を含む列のみ）
+    missing_columns = [col for col in df.select_dtypes(include='object').columns if df[col].isna().any()]
+    if missing_columns:
+        df[missing_columns] = df[missing_columns].fillna(np.nan)
+    return df
+
+def get_cached_preview(df, n_rows, cache_name):
+    """先頭行のプレビューを取得（元データが変わらない間はセッション状態にキャッシュ、行番号は1始まり）"""
+    return get_session_cached(cache_name, df, n_rows, lambda: create_preview(df, n_rows))
+
+def to_arrow_string_table(df):
+    """文字列の表示用テーブルをArrow形式の文字列型に変換（st.dataframeでの文字列の再変換を省略、pyarrow未インストール時はそのまま）"""
+    if not PYARROW_AVAILABLE:
+        return df
+    return df.astype('string[pyarrow]')
+
+def create_preview(df, n_rows):
+    """先頭行のプレビューを作成（行番号は1始まり）"""
+    preview_df = df.head(n_rows)
+    start_index = UI_DISPLAY_CONSTANTS['selectbox_start_index']
+    # set_axisは新しい表を返すため、先頭行のコピーと行番号の設定を1回で実行
+    return preview_df.set_axis(range(start_index, len(preview_df) + start_index), axis=0)
+
+def get_session_cached(cache_name, df, cache_key, compute):
+    """元データとキーが同じ間は計算結果をセッション状態にキャッシュ（元データは弱参照で同一性を判定、キーごとの結果は件数上限付き）"""
+    cache = st.session_state.get(cache_name)
+    if cache is None or cache['source']() is not df:
+        # 元データが変わった場合は以前の結果をすべて破棄
+        cache = {'source': weakref.ref(df), 'values': {}}
+        st.session_state[cache_name] = cache
+    
+    values = cache['values']
+    if cache_key in values:
+        # 直近に使用した結果を末尾に移動（上限超過時は最も古い結果から破棄）
+        values[cache_key] = values.pop(cache_key)
+    else:
+        values[cache_key] = compute()
+        if len(values) > DATA_PROCESSING_CONSTANTS['session_cache_max_entries']:
+            del values[next(iter(values))]
+    return values[cache_key]
+
+def get_category_options(df, include_all=True):
+    """分類の選択肢を取得（元データが変わらない間はキャッシュを使用、戻り値は変更しないこと）"""
+    return get_session_cached(
+        '_category_options_cache', df, include_all,
+        lambda: get_unique_categories(df, include_all=include_all)
+    )
+
+def get_category_data(df, category):
+    """指定分類の行を取得（元データが変わらない間は分類別の行位置をセッション状態にキャッシュ）"""
+    # 元データへの弱参照で同一性を判定（再マッピング後に古いデータをメモリに残さない）
+    source_ref = st.session_state.get('_category_rows_source')
+    if source_ref is None or source_ref() is not df:
+        st.session_state['_category_rows'] = df.groupby('category_code', observed=True, sort=False).indices
+        st.session_state['_category_rows_source'] = weakref.ref(df)
+    
+    rows = st.session_state['_category_rows'].get(category)
+    if rows is None:
+        return df.iloc[:0]
+    return df.iloc[rows]
+
+def set_column_options(columns):
+    """マッピング用selectboxの選択肢と列名→indexの対応表を作成してセッション状態に保存"""
+    st.session_state['_column_options'] = [''] + list(columns)
+    column_index = {}
+    for i, column in enumerate(columns):
+        column_index.setdefault(column, i + 1)  # 空の選択肢があるため+1（重複列名は先頭を優先）
+    st.session_state['_column_index'] = column_index
+
+def get_selectbox_index(value):
+    """selectboxのindex値を取得（未選択・存在しない列は0）"""
+    try:
+        return st.session_state['_column_index'].get(value, 0)
+    except TypeError:
         return 0
 
 def apply_mapping(df, mapping):
     """データフレームにマッピングを適用（カスタム項目名対応）"""
-    from utils.data_processor import normalize_numeric_columns
-    
-    mapped_df = pd.DataFrame()
-    
-    for system_field, csv_column in mapping.items():
-        if csv_column and csv_column in df.columns:
-            mapped_df[system_field] = df[csv_column]
+    # マッピング対象の列を一括で抽出してシステム項目名に変更（同じCSV列を複数項目に割り当てた場合も対応）
+    mapped_columns = {
+        system_field: csv_column
+        for system_field, csv_column in mapping.items()
+        if csv_column and csv_column in df.columns
+    }
+    mapped_df = df[list(mapped_columns.values())].set_axis(list(mapped_columns.keys()), axis=1)
     
     # ABC区分が未選択の場合は「未区分」で補完
     if 'Class_abc' not in mapped_df.columns or mapped_df['Class_abc'].isna().all():
@@ -660,12 +802,17 @@ def apply_mapping(df, mapping):
     
     # 分類データの安全な処理
     if 'category_code' in mapped_df.columns:
-        # null値や空文字を適切に処理
-        mapped_df['category_code'] = mapped_df['category_code'].fillna('未分類')
-        # 文字列型に統一
-        mapped_df['category_code'] = mapped_df['category_code'].astype(str)
-        # 空文字列を「未分類」に置換
-        mapped_df['category_code'] = mapped_df['category_code'].replace('', '未分類')
+        # 分類値の種類ごとに1回だけ文字列型に統一し、null値や空文字を「未分類」に置換
+        # （factorizeのnull値のコード-1は末尾に追加した「未分類」を参照）
+        category_codes, category_values = pd.factorize(mapped_df['category_code'])
+        category_labels = np.array(
+            ['未分類' if value == '' else value for value in category_values.astype(str)] + ['未分類'],
+            dtype=object
+        )
+        # 種類の少ない分類はカテゴリ型で保持（比較・絞り込み・集計を整数コードで実行、同じ文字列になった値は統合）
+        # np.uniqueの結果は並べ替え済みのため、カテゴリも昇順で保持（選択肢の作成時に並べ替え不要）
+        unique_labels, label_codes = np.unique(category_labels, return_inverse=True)
+        mapped_df['category_code'] = pd.Categorical.from_codes(label_codes[category_codes], unique_labels)
     
     # 数値列の正規化処理（実績、AI予測、計画01、計画02）
     numeric_columns = []
@@ -675,89 +822,139 @@ def apply_mapping(df, mapping):
     
     if numeric_columns:
         mapped_df = normalize_numeric_columns(mapped_df, target_columns=numeric_columns, log_results=True)
+        # 値域に余裕のある整数列はint32で保持
+        mapped_df = downcast_integer_columns(mapped_df, numeric_columns)
     
     return mapped_df
 
 def get_display_column_names():
-    """表示用のカラム名を取得"""
-    display_names = COLUMN_MAPPING.copy()
-    
-    # カスタム項目名を反映
-    if 'custom_column_names' in st.session_state:
-        for key, custom_name in st.session_state.custom_column_names.items():
+    """表示用のカラム名を取得（カスタム項目名が変わらない間はセッション状態にキャッシュ、戻り値は変更しないこと）"""
+    custom_column_names = st.session_state.get('custom_column_names', {})
+    cache_key = tuple(custom_column_names.items())
+    if st.session_state.get('_display_column_names_key') != cache_key:
+        display_names = COLUMN_MAPPING.copy()
+        
+        # カスタム項目名を反映
+        for key, custom_name in custom_column_names.items():
             if custom_name.strip():  # 空でない場合のみ
                 # 10文字以内に省略
                 if len(custom_name) > 10:
                     display_names[key] = custom_name[:9] + '…'
                 else:
                     display_names[key] = custom_name
+        
+        st.session_state['_display_column_names'] = display_names
+        st.session_state['_display_column_names_key'] = cache_key
     
-    return display_names
+    return st.session_state['_display_column_names']
 
 def read_csv_with_encoding(uploaded_file):
     """複数のエンコーディングを試してCSVファイルを読み込み"""
+    # 同じ内容のファイルは再解析しない（ファイル内容をキーにキャッシュ）
+    return parse_csv_bytes(uploaded_file.getvalue())
+
+# 同じファイルの再アップロード時は判別・解析を省略（アップロードされた業務データをディスクに残さないようメモリ上のみでキャッシュ）
+@st.cache_data(show_spinner=False, max_entries=4)
+def parse_csv_bytes(raw_data):
+    """CSVファイルのバイト列をエンコーディング・区切り文字を自動判別して解析"""
     # 日本語ファイル用の優先エンコーディング順序（Shift_JIS系を最優先）
     encodings = ['shift_jis', 'cp932', 'utf-8', 'utf-8-sig', 'euc-jp', 'iso-2022-jp', 'latin1']
     
     # まず文字エンコーディングを自動判別
-    raw_data = uploaded_file.getvalue()
-    detected = chardet.detect(raw_data)
-    detected_encoding = detected.get('encoding', '').lower() if detected.get('encoding') else ''
-    confidence = detected.get('confidence', 0)
+    bom_encoding = get_bom_encoding(raw_data)
+    if bom_encoding:
+        detected_encoding, confidence = bom_encoding, 1.0
+    else:
+        detected_encoding, confidence = detect_encoding_from_sample(raw_data)
     
     encoding_info = f"🔍 文字エンコーディング判別結果: {detected_encoding.upper() if detected_encoding else 'Unknown'} (信頼度: {confidence:.2f})"
     
+    # 判別結果を信頼できる場合（BOM付き・高信頼度）は、そのエンコーディングのみで読み込みを試行し、
+    # 読み込み失敗または品質不足の場合に限り他のエンコーディングを試行
+    trusted_encoding = ''
+    
+    # BOM付きの場合は判別不要のため、BOMのエンコーディングを最優先で試行
+    if bom_encoding:
+        trusted_encoding = bom_encoding
     # MacRomanや低信頼度の場合は無視してShift_JISを強制的に最初に試行
-    if detected_encoding == 'macroman':
+    elif detected_encoding == 'macroman':
         # MacRomanは日本語ファイルでは信頼できない - 完全に無視
         pass  # Shift_JISを最優先で試行
     elif confidence < 0.5:
         # 信頼度が低い場合もShift_JISを優先
         pass  # Shift_JISを最優先で試行
+    elif confidence >= 0.8 and detected_encoding:
+        trusted_encoding = detected_encoding
     elif detected_encoding and detected_encoding not in [enc.lower() for enc in encodings]:
         # 信頼度が高い場合のみ、その他の判別結果を試行リストに追加
         encodings.insert(0, detected_encoding)
     
-    # 各エンコーディングを順番に試行
+    if trusted_encoding:
+        encodings = [trusted_encoding] + [enc for enc in encodings if enc != trusted_encoding]
+    
+    # 各エンコーディングでファイル先頭のサンプルのみをデコードして品質スコアを計算
+    # （CSV全体の読み込みは採用候補のエンコーディングに対してのみ実行）
     last_error = None
-    best_result = None
-    best_score = -1
+    scored_encodings = []
     encoding_results = []  # デバッグ用
+    tried_encodings = set()  # 判定中に読み込みを試行済みのエンコーディング
     
-    for encoding in encodings:
+    def read_candidate(encoding):
+        """候補のエンコーディングでCSV全体を読み込み（失敗またはデータが空の場合はNone）"""
+        nonlocal last_error
         try:
-            # ファイルポインタをリセット
-            uploaded_file.seek(0)
-            
             # CSVファイルを読み込み（区切り文字とクォート文字を自動判別）
-            df = read_csv_with_options(uploaded_file, encoding)
-            
-            # 読み込み後の品質スコアを計算
-            quality_score = calculate_japanese_quality_score(df)
-            encoding_results.append(f"{encoding}: {quality_score}/10")
-            
-            if quality_score > best_score:
-                best_result = (df, encoding, quality_score)
-                best_score = quality_score
-            
-            # 高品質な結果が得られた場合は即座に採用
-            if quality_score >= 7:  # 10点満点中7点以上
-                break
-                
-        except (UnicodeDecodeError, UnicodeError, LookupError) as e:
+            df = read_csv_with_options(raw_data, encoding)
+        except Exception as e:
             encoding_results.append(f"{encoding}: エラー({type(e).__name__})")
             last_error = e
-            continue
-        except Exception as e:
+            return None
+        
+        if not df.empty and len(df.columns) > 0:
+            return df
+        return None
+    
+    for encoding in encodings:
+        try:
+            sample_text = decode_sample(raw_data, encoding)
+        except (UnicodeDecodeError, UnicodeError, LookupError) as e:
             encoding_results.append(f"{encoding}: エラー({type(e).__name__})")
             last_error = e
             continue
+        
+        quality_score = calculate_japanese_quality_score(sample_text)
+        encoding_results.append(f"{encoding}: {quality_score}/10")
+        
+        # 最低限の品質を満たす場合のみ採用候補とする
+        if quality_score >= 2:
+            scored_encodings.append((encoding, quality_score))
+            
+            # 信頼できる判別結果が品質を満たす場合、または高品質（7点以上）の場合は読み込み順が最優先となるため、
+            # 残りのエンコーディングを判定せずに読み込み（読み込みに失敗した場合のみ残りを判定）
+            if encoding == trusted_encoding or quality_score >= 7:
+                tried_encodings.add(encoding)
+                df = read_candidate(encoding)
+                if df is not None:
+                    return df, f"✅ ファイル読み込み完了"
+    
+    def read_priority(scored_encoding):
+        """読み込み順：信頼できる判別結果 → 高品質（7点以上）を試行順 → その他を品質スコア順"""
+        encoding, quality_score = scored_encoding
+        if encoding == trusted_encoding:
+            return (0, 0)
+        if quality_score >= 7:  # 10点満点中7点以上
+            return (1, 0)
+        return (2, -quality_score)
     
-    # 最良の結果を採用
-    if best_result and best_score >= 2:  # 最低限の品質を満たす場合
-        df, successful_encoding, score = best_result
-        # 一般ユーザー向けにシンプルなメッセージを返す
-        return df, f"✅ ファイル読み込み完了"
+    # 候補を優先順に読み込み（サンプル以降でデコードに失敗した場合は次の候補を試行、判定中に試行済みの候補は除外）
+    for encoding, quality_score in sorted(scored_encodings, key=read_priority):
+        if encoding in tried_encodings:
+            continue
+        
+        df = read_candidate(encoding)
+        if df is not None:
+            # 一般ユーザー向けにシンプルなメッセージを返す
+            return df, f"✅ ファイル読み込み完了"
     
     # すべて失敗した場合
     if last_error:
@@ -765,129 +962,162 @@ def read_csv_with_encoding(uploaded_file):
     else:
         raise Exception("CSVファイルの読み込みに失敗しました")
 
-def read_csv_with_options(uploaded_file, encoding):
-    """CSVファイルを適切なオプションで読み込み"""
-    # 区切り文字の候補
-    separators = [',', ';', '\t', '|']
+def get_bom_encoding(raw_data):
+    """BOMからエンコーディングを判定（BOMがない場合は空文字）"""
+    if raw_data[:3] == b'\xef\xbb\xbf':
+        return 'utf-8-sig'
+    if raw_data[:2] in (b'\xff\xfe', b'\xfe\xff'):
+        return 'utf-16'
+    return ''
+
+def detect_encoding_incrementally(sample):
+    """サンプルを分割して文字エンコーディング判別器に渡し、判別が確定した時点で終了"""
+    chunk_size = DATA_PROCESSING_CONSTANTS['encoding_detection_chunk_bytes']
+    detector = chardet.UniversalDetector()
+    for start in range(0, len(sample), chunk_size):
+        detector.feed(sample[start:start + chunk_size])
+        if detector.done:
+            break
+    detector.close()
+    return detector.result
+
+def detect_encoding_from_sample(raw_data):
+    """ファイル先頭のサンプルから文字エンコーディングを判別（低信頼度の場合は末尾のサンプルも判別）"""
+    sample_size = DATA_PROCESSING_CONSTANTS['encoding_detection_bytes']
+    detected = detect_encoding_incrementally(raw_data[:sample_size])
+    # cchardetは判別不能時に信頼度がNoneとなるため0として扱う
+    confidence = detected.get('confidence') or 0
     
-    # クォート文字の候補
-    quote_chars = ['"', "'", None]
+    # 先頭だけでは判別しきれない場合、末尾のサンプルで信頼度の高い方を採用
+    if confidence < 0.5 and len(raw_data) > sample_size:
+        tail_detected = detect_encoding_incrementally(raw_data[-sample_size:])
+        tail_confidence = tail_detected.get('confidence') or 0
+        if tail_confidence > confidence:
+            detected, confidence = tail_detected, tail_confidence
     
-    best_df = None
-    best_columns = 0
+    detected_encoding = detected.get('encoding', '').lower() if detected.get('encoding') else ''
+    return detected_encoding, confidence
+
+def sniff_csv_dialect(raw_data, encoding):
+    """ファイル先頭のサンプルから区切り文字・クォート文字を判別（判別できない場合はNone）"""
+    sample_text = raw_data[:4096].decode(encoding, errors='ignore')
     
-    for sep in separators:
-        for quote_char in quote_chars:
-            try:
-                uploaded_file.seek(0)
-                if quote_char is None:
-                    df = pd.read_csv(uploaded_file, encoding=encoding, sep=sep, quoting=3)  # QUOTE_NONE
-                else:
-                    df = pd.read_csv(uploaded_file, encoding=encoding, sep=sep, quotechar=quote_char)
-                
-                # より多くのカラムを持つ結果を優先
-                if len(df.columns) > best_columns and not df.empty:
-                    best_df = df
-                    best_columns = len(df.columns)
-                    
-                # 十分な数のカラムがある場合は早期終了
-                if best_columns >= 5:
-                    break
-                    
-            except Exception:
-                continue
-                
-        if best_columns >= 5:
-            break
+    # 途中で切れた最終行は判別対象から除外
+    if '\n' in sample_text:
+        sample_text = sample_text[:sample_text.rfind('\n')]
     
-    # 最良の結果を返す、なければデフォルトで再試行
-    if best_df is not None:
-        return best_df
-    else:
-        uploaded_file.seek(0)
-        return pd.read_csv(uploaded_file, encoding=encoding)
+    try:
+        return csv.Sniffer().sniff(sample_text, delimiters=',;\t|')
+    except csv.Error:
+        return None
+
+def read_csv_with_options(raw_data, encoding):
+    """CSVファイルのバイト列を適切なオプションで読み込み（自動判別・デフォルト設定での読み込みはデコード済みの文字列を共用）"""
+    # サンプルから区切り文字・クォート文字を判別できた場合は1回の読み込みで完了
+    dialect = sniff_csv_dialect(raw_data, encoding)
+    if dialect is not None:
+        try:
+            df = read_csv_with_pyarrow(raw_data, encoding, dialect.delimiter, dialect.quotechar)
+            if len(df.columns) > 1 and not df.empty:
+                return df
+        except (UnicodeDecodeError, UnicodeError, LookupError):
+            raise
+        except Exception:
+            pass
+    
+    # 以降の読み込みはファイル全体を1回だけデコードした文字列から行う（デコードできない場合はここでエラー）
+    text_data = raw_data.decode(encoding)
+    
+    # 判別できない場合はpandasの区切り文字自動判別（Pythonエンジン）で1回だけ読み込み
+    try:
+        df = pd.read_csv(io.StringIO(text_data), sep=None, engine='python')
+        if len(df.columns) > 1 and not df.empty:
+            return df
+    except Exception:
+        pass
+    
+    # 区切り文字を判別できない場合（1列のみのファイルなど）はデフォルト設定で読み込み
+    return pd.read_csv(io.StringIO(text_data))
+
+def read_csv_with_pyarrow(raw_data, encoding, sep, quotechar):
+    """区切り文字・クォート文字が確定したCSVをpyarrowエンジンで読み込み（結果がCエンジンと異なる場合はCエンジンで読み込み）"""
+    try:
+        df = pd.read_csv(io.BytesIO(raw_data), encoding=encoding, sep=sep, quotechar=quotechar, engine='pyarrow')
+        
+        # pyarrowは重複カラム名の連番付与を行わず、日付形式の文字列を日付型に自動変換するため、
+        # その場合はCエンジンの結果（文字列のまま）を使用
+        # また、デコードできない列はエラーにならずバイト列になるため、Cエンジンで読み込んでデコードエラーとする
+        object_columns = df.select_dtypes(include='object').columns
+        has_converted_values = any(
+            isinstance(df[col].dropna().iloc[0], (datetime.date, datetime.time, bytes))
+            for col in object_columns if df[col].notna().any()
+        ) or len(df.select_dtypes(include='datetime').columns) > 0
+        
+        if df.columns.is_unique and not has_converted_values:
+            # 文字列列の欠損値をCエンジンと同じNaNに統一（欠損値を含む列のみ）
+            missing_columns = [col for col in object_columns if df[col].isna().any()]
+            if missing_columns:
+                df[missing_columns] = df[missing_columns].fillna(np.nan)
+            return df
+    except (UnicodeDecodeError, UnicodeError, LookupError):
+        raise
+    except Exception:
+        pass
+    
+    return pd.read_csv(io.BytesIO(raw_data), encoding=encoding, sep=sep, quotechar=quotechar)
+
+def decode_sample(raw_data, encoding):
+    """ファイル先頭のサンプルを指定エンコーディングでデコード（末尾で途中まで切れた文字は除外）"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    return decoder.decode(raw_data[:DATA_PROCESSING_CONSTANTS['quality_score_sample_bytes']], final=False)
 
-def calculate_japanese_quality_score(df):
-    """読み込んだCSVの品質を0-10のスコアで評価"""
+def calculate_japanese_quality_score(sample_text):
+    """デコードしたCSVサンプルの品質を0-10のスコアで評価"""
     try:
-        # データフレームが空でないことを確認
-        if df.empty or len(df.columns) == 0:
+        # ヘッダー行と最初の数行のデータをサンプルとして検査
+        # サンプル全体ではなく先頭部分のみを行分割し、行数が足りない場合のみ全体を分割
+        line_count = DATA_PROCESSING_CONSTANTS['quality_score_lines']
+        lines = sample_text[:DATA_PROCESSING_CONSTANTS['quality_score_head_chars']].splitlines()
+        if len(lines) <= line_count:
+            lines = sample_text.splitlines()
+        sample_text = ' '.join(lines[:line_count])
+        
+        # サンプルが空でないことを確認
+        if not sample_text.strip():
             return 0
         
         score = 0
         
-        # カラム名と最初の数行のデータをサンプルとして検査
-        sample_texts = []
-        
-        # カラム名をチェック
-        column_names = [str(col) for col in df.columns[:10]]
-        sample_texts.extend(column_names)
-        
-        # 最初の数行のデータをチェック
-        for i in range(min(3, len(df))):
-            for j in range(min(5, len(df.columns))):
-                sample_texts.append(str(df.iloc[i, j]))
-        
-        sample_text = ' '.join(sample_texts)
-        
         # 1. 文字化けパターンの検出 (マイナス点)
-        garbled_patterns = [
-            ('��', -5),  # よくある文字化け記号
-            ('����', -5),
-            ('ï¿½', -5),
-            ('\ufffd', -5),  # Unicode replacement character
-            ('Ã¤', -3),    # UTF-8の文字化け
-            ('Ã¯', -3),
-            ('Ã¦', -3),
-            ('â€', -3),
-            ('ã¤', -3),    # 追加の文字化けパターン
-            ('ã¯', -3),
-            ('ã¦', -3),
-            ('ã¨', -3),
-            ('ã‚', -3),
-            ('ã„', -3),
-            ('ã†', -3),
-            ('ã…', -3),
-            ('ê', -2),     # MacRoman由来の文字化け
-            ('ë', -2),
-            ('è', -2),
-            ('é', -2),
-        ]
-        
-        for pattern, penalty in garbled_patterns:
-            if pattern in sample_text:
-                score += penalty
+        # いずれかのパターンを含む場合のみ、パターンごとの減点を判定
+        # （全パターンを1つにまとめた正規表現の1回のsearchで、文字化けのない通常のサンプルはパターンごとの判定を省略）
+        if GARBLED_PATTERN_REGEX.search(sample_text):
+            for pattern, penalty in GARBLED_PATTERNS:
+                if pattern in sample_text:
+                    score += penalty
         
         # 2. 日本語文字の存在チェック (プラス点)
-        if has_japanese_characters(sample_text):
+        # 日本語文字を1回の走査で抽出し、存在有無と種類を判定
+        japanese_chars = ''.join(JAPANESE_CHAR_PATTERN.findall(sample_text))
+        if japanese_chars:
             score += 5
             
-            # より詳細な日本語文字チェック
-            import re
-            hiragana_count = len(re.findall(r'[\u3040-\u309F]', sample_text))
-            katakana_count = len(re.findall(r'[\u30A0-\u30FF]', sample_text))
-            kanji_count = len(re.findall(r'[\u4E00-\u9FAF]', sample_text))
-            
             # 日本語文字の種類が多いほど高得点
-            if hiragana_count > 0:
+            if HIRAGANA_PATTERN.search(japanese_chars):
                 score += 1
-            if katakana_count > 0:
+            if KATAKANA_PATTERN.search(japanese_chars):
                 score += 1
-            if kanji_count > 0:
+            if KANJI_PATTERN.search(japanese_chars):
                 score += 2
         
         # 3. 意味のある文字列の存在チェック（このファイル特有の内容も含む）
-        meaningful_patterns = [
-            'コード', 'データ', '実績', '予測', '計画', '分類', '年月',
-            '商品', '売上', '需要', '在庫', '価格', '金額', '数量',
-            '生産工場', '生産ライン', 'ABC区分', '出庫実績', 'ハイブリッド',
-            '構成比率', '異常値', '須賀川'  # このファイル特有の内容
-        ]
-        
+        # 加点は3パターン以上で上限となるため、3パターン見つかった時点で判定を終了
         matched_patterns = 0
-        for pattern in meaningful_patterns:
+        for pattern in MEANINGFUL_PATTERNS:
             if pattern in sample_text:
                 matched_patterns += 1
+                if matched_patterns >= 3:
+                    break
         
         # マッチした意味のあるパターンの数に応じてスコアを加算
         if matched_patterns >= 3:
@@ -906,10 +1136,8 @@ def calculate_japanese_quality_score(df):
 
 def has_japanese_characters(text):
     """テキストに日本語文字が含まれているかチェック"""
-    import re
     # ひらがな、カタカナ、漢字のUnicode範囲をチェック
-    japanese_pattern = re.compile(r'[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FAF]')
-    return bool(japanese_pattern.search(text))
+    return JAPANESE_CHAR_PATTERN.search(text) is not None
 
 def validate_mapped_data(df):
     """マッピングされたデータの基本検証"""
@@ -921,27 +1149,29 @@ def validate_mapped_data(df):
                 st.error(f"❌ 必須カラム '{col}' が見つかりません")
                 return False
         
+        # 基本統計情報の確認（空のデータは数値変換の前に判定）
+        if len(df) == 0:
+            st.error("❌ データが空です")
+            return False
+        
         # データ型の確認
         numeric_columns = ['Actual', 'AI_pred', 'Plan_01']
         if 'Plan_02' in df.columns:
             numeric_columns.append('Plan_02')
         
-        for col in numeric_columns:
-            if not pd.api.types.is_numeric_dtype(df[col]):
-                try:
-                    # 数値変換を試行
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                    null_count = df[col].isnull().sum()
-                    if null_count > 0:
-                        st.warning(f"⚠️ {col}列に{null_count}件の数値変換できないデータがありました（NaNに変換）")
-                except:
-                    st.error(f"❌ {col}列を数値型に変換できません")
-                    return False
-        
-        # 基本統計情報の確認
-        if len(df) == 0:
-            st.error("❌ データが空です")
-            return False
+        # 数値型でない列のみをまとめて数値変換し、変換できなかった件数を一括で集計
+        non_numeric_columns = [col for col in numeric_columns if not pd.api.types.is_numeric_dtype(df[col])]
+        if non_numeric_columns:
+            try:
+                converted = df[non_numeric_columns].apply(pd.to_numeric, errors='coerce')
+            except:
+                st.error(f"❌ {'、'.join(non_numeric_columns)}列を数値型に変換できません")
+                return False
+            
+            df[non_numeric_columns] = converted
+            null_counts = converted.isnull().sum()
+            for col, null_count in null_counts[null_counts > 0].items():
+                st.warning(f"⚠️ {col}列に{null_count}件の数値変換できないデータがありました（NaNに変換）")
         
         st.success(f"✅ データ検証完了: {len(df)}件のデータ")
         return True
@@ -950,69 +1180,68 @@ def validate_mapped_data(df):
         st.error(f"❌ データ検証エラー: {str(e)}")
         return False
 
-def apply_monthly_correction(df):
-    """月別合計値補正を適用"""
-    corrected_df = df.copy()
+def apply_monthly_correction(df, copy=False):
+    """月別合計値補正を適用（分類・年月別の合計値を各行に展開して一括で補正）"""
+    # 補正対象の列は置き換えで更新するため元データは変更されない（copy=Falseの場合は補正対象外の列を元データと共有）
+    corrected_df = df.copy(deep=copy)
     
     # 分類カラムが存在する場合は分類ごとに補正
     if 'category_code' in df.columns and df['category_code'].notna().any():
-        category_col = 'category_code'
-        categories = df[category_col].dropna().unique()
+        group_keys = ['category_code', 'Date']
     else:
         # 分類がない場合は全体で補正
-        category_col = None
-        categories = [None]
+        group_keys = ['Date']
     
     # Plan_02の存在確認
     has_plan_02 = 'Plan_02' in df.columns
     
-    for category in categories:
-        if category_col:
-            category_data = corrected_df[corrected_df[category_col] == category]
-        else:
-            category_data = corrected_df
-        
-        # 月別の集計（Plan_02の存在に応じて動的に設定）
-        agg_dict = {
-            'AI_pred': 'sum',
-            'Plan_01': 'sum'
-        }
-        
-        if has_plan_02:
-            agg_dict['Plan_02'] = 'sum'
-        
-        monthly_data = category_data.groupby('Date').agg(agg_dict).reset_index()
-        
-        for _, month_row in monthly_data.iterrows():
-            date = month_row['Date']
-            plan_01_total = month_row['Plan_01']
-            ai_pred_total = month_row['AI_pred']
-            
-            # 補正係数の計算
-            if ai_pred_total > 0:
-                ai_correction_factor = plan_01_total / ai_pred_total
-            else:
-                ai_correction_factor = 1.0
-            
-            # AI予測の補正
-            if category_col:
-                mask = (corrected_df[category_col] == category) & (corrected_df['Date'] == date)
-            else:
-                mask = (corrected_df['Date'] == date)
-            
-            # データ型の互換性を保つため、明示的にfloat64型に変換してから計算
-            corrected_df.loc[mask, 'AI_pred'] = corrected_df.loc[mask, 'AI_pred'].astype('float64') * ai_correction_factor
-            
-            # Plan_02が存在する場合のみ補正
-            if has_plan_02:
-                plan_02_total = month_row['Plan_02']
-                if plan_02_total > 0:
-                    plan_02_correction_factor = plan_01_total / plan_02_total
-                    # データ型の互換性を保つため、明示的にfloat64型に変換してから計算
-                    corrected_df.loc[mask, 'Plan_02'] = corrected_df.loc[mask, 'Plan_02'].astype('float64') * plan_02_correction_factor
+    # 月別の集計（Plan_02の存在に応じて動的に設定）
+    # 分類・年月が欠損している行は合計値がNaNとなり、補正係数1.0（補正対象外）として扱う
+    total_columns = ['AI_pred', 'Plan_01']
+    if has_plan_02:
+        total_columns.append('Plan_02')
+    monthly_totals = corrected_df.groupby(group_keys, observed=True)[total_columns].transform('sum')
+    plan_01_total = monthly_totals['Plan_01']
+    
+    # AI予測の補正（AI予測の合計が0以下の場合は補正係数1.0）
+    ai_pred_total = monthly_totals['AI_pred']
+    ai_correction_factor = (plan_01_total / ai_pred_total).where(ai_pred_total > 0, 1.0)
+    corrected_df['AI_pred'] = apply_correction_factor(corrected_df['AI_pred'], ai_correction_factor)
+    
+    # Plan_02が存在する場合のみ補正（Plan_02の合計が0以下の場合は補正しない）
+    if has_plan_02:
+        plan_02_total = monthly_totals['Plan_02']
+        plan_02_correction_factor = (plan_01_total / plan_02_total).where(plan_02_total > 0, 1.0)
+        corrected_df['Plan_02'] = apply_correction_factor(corrected_df['Plan_02'], plan_02_correction_factor)
     
     return corrected_df
 
+def apply_correction_factor(values, correction_factor):
+    """行ごとの補正係数を適用（float64型で計算し、整数型の列で補正後も値が変わらない場合は元の型を維持）"""
+    # float64型の列は型変換のコピーを作らずにそのまま乗算
+    corrected_values = values.astype('float64', copy=False) * correction_factor
+    if pd.api.types.is_integer_dtype(values):
+        integer_values = corrected_values.astype(values.dtype)
+        if (integer_values == corrected_values).all():
+            return integer_values
+    return corrected_values
+
+def get_monthly_summary_table(data, category=None):
+    """年月別集計結果テーブルを取得（元データ・分類・項目名が同じ間はキャッシュを使用、戻り値は変更しないこと）"""
+    # 項目名はセッション状態から参照されるため、キャッシュキーに含める
+    cache_key = (category, tuple(st.session_state.custom_column_names.items()))
+    return get_session_cached(
+        '_monthly_summary_cache', data, cache_key,
+        lambda: create_monthly_summary_table(data if category is None else get_category_data(data, category))
+    )
+
+def to_summary_numeric(values):
+    """集計用に数値化（整数型の列はそのまま、それ以外は文字列からカンマを除去して数値に変換）"""
+    # 浮動小数点型は文字列経由の変換で末尾桁が変わる場合があるため、合計値を従来と揃えるよう変換対象とする
+    if pd.api.types.is_integer_dtype(values):
+        return values
+    return pd.to_numeric(values.astype(str).str.replace(',', ''), errors='coerce')
+
 def create_monthly_summary_table(df):
     """年月別集計結果テーブルを作成"""
     try:
@@ -1049,12 +1278,41 @@ def create_monthly_summary_table(df):
         plan_01_name = get_custom_column_name('Plan_01')
         plan_02_name = get_custom_column_name('Plan_02')
         
+        # 集計対象の列と表示名（AI予測・計画01が存在しない場合は0を表示、Plan_02は存在する場合のみ追加）
+        summary_columns = [('Actual', '実績合計'), ('AI_pred', ai_pred_name), ('Plan_01', plan_01_name)]
+        if 'Plan_02' in df.columns:
+            summary_columns.append(('Plan_02', plan_02_name))
+        
+        # 集計対象の年月の行のみを抽出（年月ごとに全行を比較しない）
+        target_mask = df['Date'].isin(unique_dates)
+        target_dates = df['Date'][target_mask]
+        
+        # 数値正規化を列ごとに1回だけ適用（整数型の列は文字列を経由せずそのまま使用、実績列は必須）
+        summary_values = {'Actual': to_summary_numeric(df['Actual'][target_mask])}
+        for col, _ in summary_columns[1:]:
+            if col in df.columns:
+                summary_values[col] = to_summary_numeric(df[col][target_mask])
+        
+        # 年月別の合計（整数型の列はgroupbyで一括集計、それ以外は従来と同じ合計値となるよう年月ごとにSeries.sumで集計）
+        date_sums = {}
+        integer_columns = [col for col, values in summary_values.items() if pd.api.types.is_integer_dtype(values)]
+        if integer_columns:
+            integer_sums = pd.DataFrame({col: summary_values[col] for col in integer_columns}).groupby(target_dates, sort=False).sum()
+            for col in integer_columns:
+                date_sums[col] = dict(zip(integer_sums.index, integer_sums[col].tolist()))
+        other_columns = [col for col in summary_values if col not in date_sums]
+        if other_columns:
+            date_positions = target_dates.groupby(target_dates, sort=False).indices
+            for col in other_columns:
+                date_sums[col] = {
+                    date: int(summary_values[col].iloc[positions].sum())
+                    for date, positions in date_positions.items()
+                }
+        
         # 集計データの作成
         summary_data = []
         
         for date in reversed(unique_dates):  # 古い順に表示
-            date_data = df[df['Date'] == date]
-            
             # 年月のフォーマット
             date_str = str(date)
             if len(date_str) == 6:  # YYYYMM形式
@@ -1062,64 +1320,17 @@ def create_monthly_summary_table(df):
             else:
                 formatted_date = str(date)
             
-            # 実績合計（数値正規化適用）
-            actual_sum = pd.to_numeric(date_data['Actual'].astype(str).str.replace(',', ''), errors='coerce').sum()
-            
-            row = {
-                '年月': formatted_date,
-                '実績合計': int(actual_sum)
-            }
-            
-            # AI予測列の確認と追加（数値正規化適用）
-            if 'AI_pred' in df.columns:
-                ai_sum = pd.to_numeric(date_data['AI_pred'].astype(str).str.replace(',', ''), errors='coerce').sum()
-                row[ai_pred_name] = int(ai_sum)
-            else:
-                row[ai_pred_name] = 0
-            
-            # 計画01列の確認と追加（数値正規化適用）
-            if 'Plan_01' in df.columns:
-                plan01_sum = pd.to_numeric(date_data['Plan_01'].astype(str).str.replace(',', ''), errors='coerce').sum()
-                row[plan_01_name] = int(plan01_sum)
-            else:
-                row[plan_01_name] = 0
-            
-            # Plan_02が存在する場合は追加（数値正規化適用）
-            if 'Plan_02' in df.columns:
-                plan02_sum = pd.to_numeric(date_data['Plan_02'].astype(str).str.replace(',', ''), errors='coerce').sum()
-                row[plan_02_name] = int(plan02_sum)
+            row = {'年月': formatted_date}
+            for col, display_name in summary_columns:
+                # 欠損値の年月は行が一致しないため0
+                row[display_name] = date_sums[col].get(date, 0) if col in date_sums else 0
             
             summary_data.append(row)
         
         # 合計行を追加（数値正規化適用）
-        filtered_df = df[df['Date'].isin(unique_dates)]
-        
-        # 実績合計（数値正規化適用）
-        actual_total = pd.to_numeric(filtered_df['Actual'].astype(str).str.replace(',', ''), errors='coerce').sum()
-        
-        total_row = {
-            '年月': '合計',
-            '実績合計': int(actual_total)
-        }
-        
-        # AI予測の合計（数値正規化適用）
-        if 'AI_pred' in df.columns:
-            ai_total = pd.to_numeric(filtered_df['AI_pred'].astype(str).str.replace(',', ''), errors='coerce').sum()
-            total_row[ai_pred_name] = int(ai_total)
-        else:
-            total_row[ai_pred_name] = 0
-        
-        # 計画01の合計（数値正規化適用）
-        if 'Plan_01' in df.columns:
-            plan01_total = pd.to_numeric(filtered_df['Plan_01'].astype(str).str.replace(',', ''), errors='coerce').sum()
-            total_row[plan_01_name] = int(plan01_total)
-        else:
-            total_row[plan_01_name] = 0
-        
-        # 計画02の合計（数値正規化適用）
-        if 'Plan_02' in df.columns:
-            plan02_total = pd.to_numeric(filtered_df['Plan_02'].astype(str).str.replace(',', ''), errors='coerce').sum()
-            total_row[plan_02_name] = int(plan02_total)
+        total_row = {'年月': '合計'}
+        for col, display_name in summary_columns:
+            total_row[display_name] = int(summary_values[col].sum()) if col in summary_values else 0
         
         summary_data.append(total_row)
         
@@ -1131,8 +1342,9 @@ def create_monthly_summary_table(df):
         st.error(f"年月別集計テーブル作成エラー: {str(e)}")
         return pd.DataFrame()
 
+@st.fragment
 def show_abc_settings():
-    """ABC区分設定の詳細設定画面を表示"""
+    """ABC区分設定の詳細設定画面を表示（区分の編集時はこのセクションのみ再実行）"""
     if st.session_state.abc_setting_mode == 'ratio':
         show_ratio_settings()
     else:
@@ -1209,14 +1421,18 @@ def show_ratio_settings():
                 st.session_state.abc_categories.pop(i)
                 st.rerun()
         
-        edited_categories.append({
+        edited_category = {
             'name': category['name'],
             'start_ratio': start_ratio,
             'end_ratio': end_ratio,
             'description': category.get('description', f'{category["name"]}区分')
-        })
+        }
+        # 値が変わらない区分は既存の辞書をそのまま使用
+        edited_categories.append(category if category == edited_category else edited_category)
     
-    st.session_state.abc_categories = edited_categories
+    # いずれかの区分が変更された場合のみセッション状態を更新
+    if edited_categories != st.session_state.abc_categories:
+        st.session_state.abc_categories = edited_categories
 
 def show_quantity_settings():
     """数量範囲設定画面"""
@@ -1295,7 +1511,8 @@ def calculate_quantity_defaults_from_ratio():
         if 'data' not in st.session_state or st.session_state.data is None:
             return get_fallback_quantity_defaults()
             
-        df = st.session_state.data.copy()
+        # 集計のみで元データは変更しないため、コピーせずに参照
+        df = st.session_state.data
         
         # 対象分類の決定
         target_categories = st.session_state.selected_generation_categories if st.session_state.selected_generation_categories else None
@@ -1386,9 +1603,8 @@ def get_fallback_quantity_defaults():
 def add_abc_category(category_name, mode):
     """ABC区分の追加"""
     if mode == 'ratio':
-        existing_names = [cat['name'] for cat in st.session_state.abc_categories]
-        if category_name not in existing_names:
-            last_end = max([cat['end_ratio'] for cat in st.session_state.abc_categories]) if st.session_state.abc_categories else 0.0
+        if all(cat['name'] != category_name for cat in st.session_state.abc_categories):
+            last_end = max((cat['end_ratio'] for cat in st.session_state.abc_categories), default=0.0)
             # より実用的なデフォルト値を設定（10%刻み）
             default_increment = 0.1  # 10%
             new_end_ratio = min(1.0, last_end + default_increment)
@@ -1404,8 +1620,7 @@ def add_abc_category(category_name, mode):
             st.session_state.abc_categories.append(new_category)
             st.rerun()
     else:
-        existing_names = [cat['name'] for cat in st.session_state.abc_quantity_categories]
-        if category_name not in existing_names:
+        if all(cat['name'] != category_name for cat in st.session_state.abc_quantity_categories):
             # より実用的なデフォルト値を設定
             default_min_value = 100  # 100単位のデフォルト値
             
@@ -1442,25 +1657,14 @@ def execute_abc_generation_process():
             target_categories = st.session_state.selected_generation_categories if st.session_state.selected_generation_categories else None
             preserve_existing = True
             
-            # ABC区分の計算
-            mapped_df = st.session_state.data.copy()
-            
-            if st.session_state.abc_setting_mode == 'ratio':
-                mapped_df = calculate_abc_classification(
-                    mapped_df,
-                    categories=current_categories,
-                    base_column='Actual',
-                    target_categories=target_categories,
-                    preserve_existing=preserve_existing
-                )
-            else:
-                mapped_df = calculate_abc_classification_by_quantity(
-                    mapped_df,
-                    categories=current_categories,
-                    base_column='Actual',
-                    target_categories=target_categories,
-                    preserve_existing=preserve_existing
-                )
+            # ABC区分の計算（結果が次回の生成元データとなり同じデータで再計算されないため、キャッシュせずに計算）
+            mapped_df = calculate_abc_classification_by_mode(
+                st.session_state.data,
+                st.session_state.abc_setting_mode,
+                current_categories,
+                target_categories,
+                preserve_existing
+            )
             
             st.session_state.data = mapped_df
             st.session_state.abc_generation_completed = True
@@ -1472,59 +1676,68 @@ def execute_abc_generation_process():
     except Exception as e:
         st.error(f"❌ ABC区分計算エラー: {str(e)}")
 
+def calculate_abc_classification_by_mode(df, setting_mode, categories, target_categories, preserve_existing):
+    """設定方式（構成比率範囲・数量範囲）に応じてABC区分を計算"""
+    if setting_mode == 'ratio':
+        return calculate_abc_classification(
+            df,
+            categories=categories,
+            base_column='Actual',
+            target_categories=target_categories,
+            preserve_existing=preserve_existing
+        )
+    return calculate_abc_classification_by_quantity(
+        df,
+        categories=categories,
+        base_column='Actual',
+        target_categories=target_categories,
+        preserve_existing=preserve_existing
+    )
+
 def show_abc_generation_results():
     """ABC区分生成結果の表示"""
-    abc_summary = get_abc_classification_summary(st.session_state.data, 'Class_abc', 'Actual')
+    data = st.session_state.data
+    abc_summary = get_session_cached(
+        '_abc_summary_cache', data, None,
+        lambda: get_abc_classification_summary(data, 'Class_abc', 'Actual')
+    )
     
     if abc_summary:
         # 分類フィルター
-        if 'category_code' in st.session_state.data.columns:
-            categories = ['全て'] + sorted(st.session_state.data['category_code'].dropna().unique().tolist())
+        if 'category_code' in data.columns:
+            categories = get_category_options(data)
             selected_category = st.selectbox("分類フィルター", categories, key="abc_filter")
             
             if selected_category != '全て':
-                filtered_data = st.session_state.data[st.session_state.data['category_code'] == selected_category]
-                abc_summary = get_abc_classification_summary(filtered_data, 'Class_abc', 'Actual')
-        
-        # 結果テーブルの作成
-        abc_result_data = []
-        total_count = 0
-        total_actual = 0
+                abc_summary = get_session_cached(
+                    '_abc_summary_cache', data, selected_category,
+                    lambda: get_abc_classification_summary(get_category_data(data, selected_category), 'Class_abc', 'Actual')
+                )
         
+        # 結果テーブルの作成（集計結果の辞書を区分をインデックスとした列として一括で整列）
         sorted_categories = sorted(abc_summary['counts'].keys())
-        
-        for category in sorted_categories:
-            count = abc_summary['counts'].get(category, 0)
-            ratio = abc_summary['ratios'].get(category, 0)
-            actual_sum = abc_summary['actual_sums'].get(category, 0)
-            
-            abc_result_data.append({
-                'ABC区分': f"{category}区分",
-                '件数': count,
-                '実績合計': actual_sum,
-                '構成比率（%）': f"{ratio:.2f}%"
-            })
-            total_count += count
-            total_actual += actual_sum
-        
-        # 合計行を追加
-        abc_result_data.append({
-            'ABC区分': '合計',
-            '件数': total_count,
-            '実績合計': total_actual,
-            '構成比率（%）': "100.00%"
+        summary_df = pd.DataFrame({
+            'count': pd.Series(abc_summary['counts']).reindex(sorted_categories, fill_value=0),
+            'actual': pd.Series(abc_summary['actual_sums']).reindex(sorted_categories, fill_value=0),
+            'ratio': pd.Series(abc_summary['ratios'], dtype='float64').reindex(sorted_categories, fill_value=0)
         })
         
-        result_df = pd.DataFrame(abc_result_data)
-        
-        # 数値項目にカンマを追加
-        formatted_abc_df = result_df.copy()
-        formatted_abc_df['件数'] = formatted_abc_df['件数'].apply(
-            lambda x: f"{x:,}" if isinstance(x, (int, float)) else x
-        )
-        formatted_abc_df['実績合計'] = formatted_abc_df['実績合計'].apply(
-            lambda x: f"{x:,.0f}" if isinstance(x, (int, float)) else x
-        )
+        # 数値項目にカンマを追加し、合計行を末尾に追加
+        formatted_abc_df = pd.concat([
+            pd.DataFrame({
+                'ABC区分': summary_df.index.map('{}区分'.format),
+                '件数': summary_df['count'].map('{:,}'.format),
+                '実績合計': summary_df['actual'].map('{:,.0f}'.format),
+                '構成比率（%）': summary_df['ratio'].map('{:.2f}%'.format)
+            }),
+            pd.DataFrame({
+                'ABC区分': ['合計'],
+                '件数': ['{:,}'.format(sum(summary_df['count'].tolist()))],
+                '実績合計': ['{:,.0f}'.format(sum(summary_df['actual'].tolist()))],
+                '構成比率（%）': ["100.00%"]
+            })
+        ], ignore_index=True)
+        formatted_abc_df = to_arrow_string_table(formatted_abc_df)
         
         # Streamlit標準のcolumn_configで数値項目を左詰めカンマ付き表示（均等割り）
         st.dataframe(
@@ -1,9 +1,11 @@
 # 共通ヘルパー関数
 # 各ページで使用される共通処理を統合管理
 
+import weakref
 import streamlit as st
 import pandas as pd
 import numpy as np
+from utils.data_processor import normalize_numeric_columns, get_present_categories
 
 def safe_get_session_state(key, default_value=None):
     """セッション状態を安全に取得"""
@@ -42,7 +44,12 @@ def get_unique_categories(df, category_column='category_code', include_all=True)
     if category_column not in df.columns:
         return ['全て'] if include_all else []
     
-    categories = sorted(df[category_column].dropna().unique().tolist())
+    # カテゴリ型の場合は値を走査せず、整数コードから使用中のカテゴリのみを取得
+    category_series = df[category_column]
+    categories = get_present_categories(category_series)
+    # マッピング時に並べ替え済みのカテゴリ型（カテゴリの順序で取得済み）は並べ替えを省略
+    if not (isinstance(category_series.dtype, pd.CategoricalDtype) and category_series.cat.categories.is_monotonic_increasing):
+        categories = sorted(categories)
     if include_all:
         return ['全て'] + categories
     return categories
@@ -183,13 +190,29 @@ def is_consecutive_dates(dates):
     
     return True
 
+def get_available_dates(df, date_column='Date'):
+    """利用可能な年月を昇順で取得（同じデータの間はセッション状態にキャッシュ）"""
+    if date_column not in df.columns:
+        return []
+    
+    # データが差し替わった場合のみ再計算（再実行のたびの全件ユニーク・ソートを回避）
+    # 元データへの弱参照で同一性を判定（解放後に同じidの別データで古い結果を返さない）
+    source_ref = st.session_state.get('_available_dates_source')
+    if (source_ref is None or source_ref() is not df
+            or st.session_state.get('_available_dates_column') != date_column):
+        st.session_state['_available_dates'] = np.sort(df[date_column].dropna().unique()).tolist()
+        st.session_state['_available_dates_source'] = weakref.ref(df)
+        st.session_state['_available_dates_column'] = date_column
+    
+    return st.session_state['_available_dates']
+
 def get_enhanced_date_options(df, date_column='Date'):
     """要求仕様に従った期間選択肢を生成"""
     if date_column not in df.columns:
         return ['全期間']
     
     # 利用可能な年月を取得（昇順ソート）
-    available_dates = sorted(df[date_column].dropna().unique().tolist())
+    available_dates = get_available_dates(df, date_column)
     
     if len(available_dates) == 0:
         return ['全期間']
@@ -240,7 +263,7 @@ def parse_date_filter_selection(selected_date, df, date_column='Date'):
         filtered_df = df.copy()
     else:
         # 利用可能な年月を取得（昇順ソート）
-        available_dates = sorted(df[date_column].dropna().unique().tolist())
+        available_dates = np.sort(df[date_column].dropna().unique()).tolist()
         
         if len(available_dates) == 0:
             filtered_df = df.copy()
@@ -305,7 +328,7 @@ def is_single_month_selection(selected_date, df, date_column='Date'):
         return False
     
     # 利用可能な年月を取得
-    available_dates = sorted(df[date_column].dropna().unique().tolist()) if date_column in df.columns else []
+    available_dates = get_available_dates(df, date_column)
     
     # selected_dateを文字列に変換
     selected_date_str = str(selected_date)
@@ -342,7 +365,8 @@ def aggregate_data_for_cumulative_evaluation(df, selected_date, date_column='Dat
     agg_dict = {col: 'sum' for col in numeric_columns if col in filtered_df.columns}
     
     try:
-        cumulative_df = filtered_df.groupby(group_columns).agg(agg_dict).reset_index()
+        # 分類はカテゴリ型のため、データのある組み合わせのみ集計
+        cumulative_df = filtered_df.groupby(group_columns, observed=True).agg(agg_dict).reset_index()
         
         # 期間情報を追加（集計期間を示すために）
         selected_date_str = str(selected_date)
@@ -365,8 +389,6 @@ def _ensure_numeric_normalization(df):
         return df
     
     try:
-        from utils.data_processor import normalize_numeric_columns
-        
         # 数値正規化対象の列を特定
         numeric_columns = []
         for col in df.columns:
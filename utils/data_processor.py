@@ -3,6 +3,22 @@ import numpy as np
 import streamlit as st
 from config.settings import ABC_CLASSIFICATION_SETTINGS
 
+# pyarrowは任意依存（未インストール時はpandasで数値変換）
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pc = None
+    PYARROW_AVAILABLE = False
+
+# pyarrowで直接整数型に変換する文字列の形式（カンマ除去後、15桁以内の整数のみ：浮動小数点への変換でも誤差が出ない範囲）
+INTEGER_STRING_PATTERN = r'^-?[0-9]{1,15}$'
+
+# int32に縮小する整数列の値の上限（絶対値、列同士の差分や合計でもint32の範囲に収まる2^30未満に限定）
+INT32_DOWNCAST_LIMIT = 2 ** 30
+
 def preview_data(df, n_rows=5):
     """データのプレビューを生成"""
     if df is None or df.empty:
@@ -71,14 +87,18 @@ def normalize_numeric_columns(df, target_columns=None, log_results=True):
         
         # 文字列の場合の正規化処理
         if original_values.dtype == 'object':
-            # カンマ除去と前後の空白除去
-            normalized_values = original_values.astype(str).str.replace(',', '').str.strip()
+            # カンマ付き整数の文字列のみの列は整数型に直接変換（それ以外の列は文字列を正規化して変換）
+            numeric_values = _cast_integer_strings(original_values)
             
-            # 空文字列やNaNを適切に処理
-            normalized_values = normalized_values.replace(['', 'nan', 'NaN', 'None'], pd.NA)
-            
-            # 数値変換
-            numeric_values = pd.to_numeric(normalized_values, errors='coerce')
+            if numeric_values is None:
+                # カンマ除去と前後の空白除去
+                normalized_values = original_values.astype(str).str.replace(',', '').str.strip()
+                
+                # 空文字列やNaNを適切に処理
+                normalized_values = normalized_values.replace(['', 'nan', 'NaN', 'None'], pd.NA)
+                
+                # 数値変換
+                numeric_values = pd.to_numeric(normalized_values, errors='coerce')
             
         else:
             # 既に数値型の場合はそのまま使用
@@ -125,6 +145,66 @@ def normalize_numeric_columns(df, target_columns=None, log_results=True):
     
     return df_normalized
 
+def _cast_integer_strings(values):
+    """
+    カンマ付き整数の文字列のみからなる列をpyarrowで整数型に変換
+    
+    Parameters:
+    values: Series - 文字列（object型）の列
+    
+    Returns:
+    Series - 変換後の数値列（欠損値を含む場合は浮動小数点型）。変換対象外の値を含む場合はNone
+    """
+    if not PYARROW_AVAILABLE or pd.api.types.infer_dtype(values, skipna=True) != 'string':
+        return None
+    
+    # カンマ除去と前後の空白除去
+    cleaned = pc.ascii_trim_whitespace(pc.replace_substring(pa.array(values, from_pandas=True, type=pa.string()), ',', ''))
+    
+    # 整数以外（小数・指数表記・空文字列など）を含む場合は従来の方法で変換
+    if not pc.all(pc.match_substring_regex(cleaned, INTEGER_STRING_PATTERN)).as_py():
+        return None
+    
+    integer_values = pc.cast(cleaned, pa.int64()).to_numpy(zero_copy_only=False)
+    return pd.Series(integer_values, index=values.index, name=values.name)
+
+def get_present_categories(category_series):
+    """
+    分類列に出現する値（欠損値を除く）を取得
+    
+    Parameters:
+    category_series: Series - 分類の列
+    
+    Returns:
+    list - 出現する分類の値（カテゴリ型の場合は値を走査せず、整数コードの出現有無から使用中のカテゴリのみを取得）
+    """
+    if isinstance(category_series.dtype, pd.CategoricalDtype):
+        codes = category_series.cat.codes.to_numpy()
+        used = np.bincount(codes[codes >= 0], minlength=len(category_series.cat.categories)) > 0
+        return category_series.cat.categories[used].tolist()
+    return category_series.dropna().unique().tolist()
+
+def downcast_integer_columns(df, target_columns):
+    """
+    整数列を値域に応じてint32に縮小（メモリ使用量と集計時のデータ量を半減）
+    
+    Parameters:
+    df: DataFrame - データフレーム（列を直接変換）
+    target_columns: list - 対象の列名リスト
+    
+    Returns:
+    DataFrame - 変換後のデータフレーム（浮動小数点列と値域を超える整数列はそのまま）
+    """
+    for col in target_columns:
+        if col not in df.columns or df[col].dtype != np.int64:
+            continue
+        
+        values = df[col].to_numpy()
+        if len(values) == 0 or (values.min() > -INT32_DOWNCAST_LIMIT and values.max() < INT32_DOWNCAST_LIMIT):
+            df[col] = values.astype(np.int32)
+    
+    return df
+
 def _log_normalization_results(log_data):
     """正規化結果をログ出力（問題がある場合のみ）"""
     
@@ -268,10 +348,10 @@ def calculate_abc_classification(df, categories=None, base_column='Actual', targ
         # 処理対象の分類を決定
         if target_categories is not None:
             # 指定された分類のみ処理
-            categories_list = [cat for cat in df_work['category_code'].dropna().unique() if cat in target_categories]
+            categories_list = [cat for cat in get_present_categories(df_work['category_code']) if cat in target_categories]
         else:
             # 全分類を処理
-            categories_list = df_work['category_code'].dropna().unique()
+            categories_list = get_present_categories(df_work['category_code'])
         
         for category_code in categories_list:
             category_data = df_work[df_work['category_code'] == category_code]
@@ -544,10 +624,10 @@ def calculate_abc_classification_by_quantity(df, categories=None, base_column='A
         # 処理対象の分類を決定
         if target_categories is not None:
             # 指定された分類のみ処理
-            categories_list = [cat for cat in df_work['category_code'].dropna().unique() if cat in target_categories]
+            categories_list = [cat for cat in get_present_categories(df_work['category_code']) if cat in target_categories]
         else:
             # 全分類を処理
-            categories_list = df_work['category_code'].dropna().unique()
+            categories_list = get_present_categories(df_work['category_code'])
         
         for category_code in categories_list:
             category_data = df_work[df_work['category_code'] == category_code]
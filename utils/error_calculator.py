@@ -2,6 +2,31 @@ import pandas as pd
 import numpy as np
 import streamlit as st
 
+# numbaは任意依存（未インストール時はpandasのgroupby集計を使用）
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
+
+# numexprは任意依存（未インストール時はNumPyで計算）
+try:
+    import numexpr
+    NUMEXPR_AVAILABLE = True
+except ImportError:
+    numexpr = None
+    NUMEXPR_AVAILABLE = False
+
+# 加重平均の対象となる誤差率カラム（絶対・正・負）
+WEIGHTED_ERROR_RATE_COLUMNS = ['absolute_error_rate', 'positive_error_rate', 'negative_error_rate']
+
+# numbaによるグループ別集計に切り替える行数の閾値
+NUMBA_GROUPED_MIN_ROWS = 1_000_000
+
+# numexprによる加重積の計算に切り替える行数の閾値
+NUMEXPR_MIN_ROWS = 100_000
+
 def calculate_error_rates(df, plan_column, actual_column):
     """
     誤差率を計算（分母：実績値）
@@ -93,6 +118,145 @@ def calculate_weighted_average_error_rate(df, error_rate_column, weight_column):
     
     return weighted_sum / weight_sum
 
+def add_weighted_error_columns(df, weight_column, error_rate_columns=None):
+    """
+    加重平均誤差率の分子・分母となる列を事前計算して追加
+    
+    calculate_weighted_average_error_rateと同じく、誤差率・重みのNaNおよび
+    誤差率のinf（計算不能）の行は分子・分母の両方から除外（0として扱う）
+    
+    Parameters:
+    df: DataFrame - calculate_error_ratesで誤差率が追加されたデータフレーム（列を直接追加）
+    weight_column: str - 重み（実績値）カラム名
+    error_rate_columns: list - 対象の誤差率カラム名リスト（Noneの場合は絶対・正・負の3種類）
+    
+    Returns:
+    DataFrame - 分子列「_w_<誤差率カラム名>」と分母列「_d_<誤差率カラム名>」が追加されたデータフレーム
+    """
+    if error_rate_columns is None:
+        error_rate_columns = WEIGHTED_ERROR_RATE_COLUMNS
+    
+    weights = df[weight_column].to_numpy(dtype='float64', na_value=np.nan)
+    weight_valid = ~np.isnan(weights)
+    use_numexpr = NUMEXPR_AVAILABLE and len(df) >= NUMEXPR_MIN_ROWS
+    
+    for error_rate_column in error_rate_columns:
+        error_rates = df[error_rate_column].to_numpy(dtype='float64', na_value=np.nan)
+        # NaNとinf（計算不能）を除外
+        valid_mask = weight_valid & np.isfinite(error_rates)
+        
+        # 誤差率 × 実績値（分子）と有効行の実績値（分母）
+        if use_numexpr:
+            # 大規模データは中間配列を作らずマルチスレッドで計算
+            weighted_errors = numexpr.evaluate('where(valid_mask, error_rates * weights, 0.0)')
+            valid_weights = numexpr.evaluate('where(valid_mask, weights, 0.0)')
+        else:
+            weighted_errors = np.multiply(error_rates, weights, out=np.zeros_like(weights), where=valid_mask)
+            valid_weights = np.where(valid_mask, weights, 0.0)
+        
+        df[f'_w_{error_rate_column}'] = weighted_errors
+        df[f'_d_{error_rate_column}'] = valid_weights
+    
+    return df
+
+if NUMBA_AVAILABLE:
+    @numba.njit(parallel=True, cache=True)
+    def _grouped_weighted_sums_kernel(codes, error_rates, weights, n_groups, n_chunks):
+        """グループ別の分子・分母・件数・実績合計を1パスで集計（スレッド別の部分配列を最後に合算）"""
+        n_rows, n_columns = error_rates.shape
+        chunk_size = (n_rows + n_chunks - 1) // n_chunks
+        
+        numerators = np.zeros((n_chunks, n_groups, n_columns))
+        denominators = np.zeros((n_chunks, n_groups, n_columns))
+        counts = np.zeros((n_chunks, n_groups), dtype=np.int64)
+        actual_sums = np.zeros((n_chunks, n_groups))
+        
+        for chunk in numba.prange(n_chunks):
+            start = chunk * chunk_size
+            end = min(start + chunk_size, n_rows)
+            for i in range(start, end):
+                group = codes[i]
+                if group < 0:
+                    continue
+                counts[chunk, group] += 1
+                weight = weights[i]
+                if np.isnan(weight):
+                    continue
+                actual_sums[chunk, group] += weight
+                for j in range(n_columns):
+                    error_rate = error_rates[i, j]
+                    # NaNとinf（計算不能）は分子・分母の両方から除外
+                    if np.isfinite(error_rate):
+                        numerators[chunk, group, j] += error_rate * weight
+                        denominators[chunk, group, j] += weight
+        
+        return numerators.sum(axis=0), denominators.sum(axis=0), counts.sum(axis=0), actual_sums.sum(axis=0)
+
+def _grouped_weighted_sums_numba(df, group_column, weight_column, error_rate_columns):
+    """numbaカーネルでグループ別の分子・分母・件数・実績合計を集計"""
+    codes, groups = pd.factorize(df[group_column], sort=True)
+    error_rates = np.ascontiguousarray(df[error_rate_columns].to_numpy(dtype='float64', na_value=np.nan))
+    weights = df[weight_column].to_numpy(dtype='float64', na_value=np.nan)
+    
+    numerators, denominators, counts, actual_sums = _grouped_weighted_sums_kernel(
+        codes.astype(np.int64), error_rates, weights, len(groups), numba.get_num_threads()
+    )
+    
+    result = pd.DataFrame(index=pd.Index(groups, name=group_column))
+    for j, error_rate_column in enumerate(error_rate_columns):
+        result[f'_w_{error_rate_column}'] = numerators[:, j]
+        result[f'_d_{error_rate_column}'] = denominators[:, j]
+    result['count'] = counts
+    result['actual_sum'] = actual_sums
+    
+    # groupby(observed=True)と同様に該当行のないグループは除外
+    return result[result['count'] > 0]
+
+def _grouped_weighted_sums_pandas(df, group_column, weight_column, error_rate_columns):
+    """pandasのgroupbyでグループ別の分子・分母・件数・実績合計を集計"""
+    weighted_df = add_weighted_error_columns(
+        df[[group_column, weight_column] + error_rate_columns].copy(), weight_column, error_rate_columns
+    )
+    weighted_columns = [f'{prefix}{col}' for col in error_rate_columns for prefix in ('_w_', '_d_')]
+    grouped = weighted_df.groupby(group_column, sort=True, observed=True)
+    
+    result = grouped[weighted_columns].sum()
+    result['count'] = grouped.size()
+    result['actual_sum'] = grouped[weight_column].sum()
+    
+    return result
+
+def calculate_grouped_weighted_average_error_rates(df, group_column, weight_column, error_rate_columns=None):
+    """
+    グループ別の加重平均誤差率を一括計算
+    
+    行数がNUMBA_GROUPED_MIN_ROWS以上でnumbaが利用可能な場合は並列カーネルで1パス集計し、
+    それ以外はadd_weighted_error_columnsの分子・分母列をpandasのgroupbyで集計
+    
+    Parameters:
+    df: DataFrame - calculate_error_ratesで誤差率が追加されたデータフレーム
+    group_column: str - グループ化するカラム名（ABC区分など）
+    weight_column: str - 重み（実績値）カラム名
+    error_rate_columns: list - 対象の誤差率カラム名リスト（Noneの場合は絶対・正・負の3種類）
+    
+    Returns:
+    DataFrame - グループ別の件数(count)・実績合計(actual_sum)・各誤差率の加重平均と分子・分母の合計
+    """
+    if error_rate_columns is None:
+        error_rate_columns = WEIGHTED_ERROR_RATE_COLUMNS
+    
+    if NUMBA_AVAILABLE and len(df) >= NUMBA_GROUPED_MIN_ROWS:
+        result = _grouped_weighted_sums_numba(df, group_column, weight_column, error_rate_columns)
+    else:
+        result = _grouped_weighted_sums_pandas(df, group_column, weight_column, error_rate_columns)
+    
+    # 加重平均誤差率 = Σ(誤差率 × 実績値) ÷ Σ(実績値)（分母0は計算不能としてNaN）
+    for error_rate_column in error_rate_columns:
+        denominator = result[f'_d_{error_rate_column}']
+        result[error_rate_column] = (result[f'_w_{error_rate_column}'] / denominator).where(denominator != 0)
+    
+    return result
+
 def categorize_error_rates(df, error_rate_column, error_type='absolute'):
     """
     誤差率を区分に分類（新仕様対応）